@@ -1,24 +1,41 @@
+from functools import lru_cache
 from typing import Literal
 
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Config(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+
     default_model: str = "deepseek-chat"
     default_vl_model: str = "Qwen/Qwen3-VL-30B-A3B-Instruct"
+    parse_model: str | None = None
     headless_browser: bool = True
     browser_width: int = 1920
     browser_height: int = 1080
     browser_driver: Literal["chrome", "firefox"] = "chrome"
+    browser_pool_size: int = 1
+    browser_acquire_timeout: float | None = 300
+    max_parallel_nodes: int = 1
+    max_parallel_scenarios: int = 4
+    max_html_bytes: int = 2 * 1024 * 1024
     deepseek_api_key: str | None = None
     openai_api_key: str | None = None
     huggingfacehub_api_token: str | None = None
     mode : str = "dev"
     client_host : str | None = None
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Loads the settings from the environment and ``.env`` once, then returns the same frozen instance."""
+    return Config()
 
 
-config = Config()
+def __getattr__(name: str):
+    # The settings are only exposed through get_config(), catch leftover `config.config` accesses
+    if name == "config":
+        raise AttributeError(
+            "module 'config' no longer exposes a 'config' instance, use config.get_config() instead."
+        )
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
@@ -1,30 +1,224 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import threading
+from contextlib import ExitStack, asynccontextmanager, closing
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator, TypeVar
+
+from fastapi import FastAPI, Request
 from fastapi.responses import Response, StreamingResponse
 from fastapi import status
 from fastapi.middleware.cors import CORSMiddleware
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from pydantic import BaseModel
 
 import config
-from services.evaluators.base import Orchestrator
-from services.evaluators.messages import StreamableMessage
-from services.evaluators.connectivity import AccessCheckNode, DriverAccessNode
-from services.evaluators.drivers import create_driver
-from services.evaluators.html.compliance import HtmlComplianceNode
-from services.evaluators.html.parser import HtmlParsingNode
-from services.evaluators.qa.scenarios.execution import TestScenarioExecutionNode
-from services.evaluators.qa.scenarios.generation import TestScenarioGenerationNode
-from services.evaluators.qa.ui import UIAnalyzerNode
+
+if TYPE_CHECKING:
+    from services.evaluators.base import BaseExecutionNode
+    from services.evaluators.messages import StreamableMessage
+
+try:
+    from fastapi.sse import EventSourceResponse, ServerSentEvent
+except ImportError:  # FastAPI < 0.135, only NDJSON streaming is available
+    EventSourceResponse = ServerSentEvent = None
+
+T = TypeVar("T")
+
+app_logger = logging.getLogger("blackscope")
+
+# Static body of the health check, polled frequently by load balancers
+HEALTH_BODY = orjson.dumps({"status": "UP"})
+# Static body of the root route
+ROOT_BODY = orjson.dumps({"message": "Hello World"})
+
+# Headers sent with every HTTP request made during evaluations
+DEFAULT_HEADERS = MappingProxyType(
+    {
+        "User-Agent": "blackscope/0.1",
+        "Accept": "text/html,application/xhtml+xml,application/xml",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Accept-Encoding": "gzip, deflate",
+        "Upgrade-Insecure-Requests": "1",
+    }
+)
 
 
 class UrlRequest(BaseModel):
     url: str
 
 
-class UpdateMessage(BaseModel):
-    type: str
-    content: StreamableMessage
+def encode_update(msg: "StreamableMessage") -> bytes:
+    """
+    Encodes a streamed message as a single NDJSON line ``{"type": "update", "content": msg}``.
+
+    The envelope is assembled as a plain dict and serialized with orjson, which avoids
+    validating a wrapping model per message and the str to bytes re-encoding.
+    The line terminator is appended by orjson itself rather than by concatenation.
+    """
+    return orjson.dumps(
+        {"type": "update", "content": msg.model_dump(mode="json")},
+        option=orjson.OPT_APPEND_NEWLINE,
+    )
+
+
+async def stream_from_thread(produce: Callable[[], Iterator[T]]) -> AsyncIterator[T]:
+    """
+    Runs a blocking producer in a dedicated thread and relays its chunks asynchronously.
+
+    Starlette iterates synchronous generators by offloading every single step to its
+    threadpool. The evaluation is blocking end-to-end (HTTP, WebDriver and LLM calls), so it
+    is instead run once in its own thread, handing chunks over to the event loop through a
+    queue. If the client disconnects, the producer is stopped at the next chunk boundary.
+
+    :param produce: Factory returning the blocking iterator of chunks to stream.
+    :return: An asynchronous iterator over the produced chunks.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    cancelled = threading.Event()
+    end_of_stream = object()
+
+    def publish(item):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:  # Event loop already closed
+            cancelled.set()
+
+    def worker():
+        try:
+            with closing(produce()) as chunks:
+                for chunk in chunks:
+                    if cancelled.is_set():
+                        break
+                    publish(chunk)
+        except Exception as e:
+            publish(e)
+        finally:
+            publish(end_of_stream)
+
+    threading.Thread(target=worker, name="qa-stream", daemon=True).start()
+    try:
+        while (item := await queue.get()) is not end_of_stream:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        cancelled.set()
+
+
+def create_session(adapter: HTTPAdapter) -> requests.Session:
+    """
+    Creates the HTTP session of a single evaluation, on top of the shared connection pool.
+
+    Cookies are not carried over from one evaluation to another, only the connections held by
+    the adapter are reused. The session must not be closed, which would close the adapter.
+    """
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterator[bytes], max_bytes: int = 16_384, max_delay: float = 0.01
+) -> AsyncIterator[bytes]:
+    """
+    Batches bursts of small chunks so they are sent through a single ASGI message.
+
+    Buffered chunks are flushed once ``max_bytes`` is reached, when no further chunk
+    arrives within ``max_delay`` seconds, or before an error of the source is propagated. Chunks are concatenated as-is, so line-delimited
+    framing is preserved.
+
+    :param chunks: The chunks to batch.
+    :param max_bytes: Size from which the buffer is flushed immediately.
+    :param max_delay: Maximum time in seconds a buffered chunk waits for followers.
+    :return: An asynchronous iterator over the batched chunks.
+    """
+    buffer = bytearray()
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(chunks))
+            try:
+                chunk = await asyncio.wait_for(
+                    asyncio.shield(pending), timeout=max_delay if buffer else None
+                )
+            except asyncio.TimeoutError:
+                yield bytes(buffer)
+                buffer.clear()
+                continue
+            except StopAsyncIteration:
+                break
+            except Exception:
+                # The chunks received before the failure are still delivered
+                if buffer:
+                    yield bytes(buffer)
+                raise
+            pending = None
+            buffer += chunk
+            if len(buffer) >= max_bytes:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Creates the resources shared by every evaluation for the lifetime of the application.
+
+    A single HTTP adapter keeps connections (and TLS sessions) alive across requests, and a
+    pool of pre-launched browsers avoids paying the WebDriver startup cost on every call.
+    """
+    # Transient connection failures are retried, with a short backoff. Error statuses are not,
+    # and Retry-After is ignored, so that the evaluated site cannot stall the evaluation
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=2,
+            connect=2,
+            read=2,
+            status=0,
+            other=0,
+            backoff_factor=0.2,
+            respect_retry_after_header=False,
+        ),
+    )
+    from services.evaluators.drivers import DriverPool
+
+    driver_pool = DriverPool(config.get_config().browser_pool_size)
+
+    def warm_up():
+        try:
+            load_evaluator_nodes()
+            driver_pool.warm_up()
+        except Exception as e:  # Drivers are launched on demand instead
+            app_logger.warning(f"Failed to warm up the evaluators: {e}")
+
+    # Warmed up in the background, so that health checks are served right away
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+    app.state.http_adapter = adapter
+    app.state.driver_pool = driver_pool
+    try:
+        yield
+    finally:
+        driver_pool.close()
+        adapter.close()
+
 
 def init_app():
     app=FastAPI(
@@ -33,10 +227,12 @@ def init_app():
         version="0.0.1",
         docs_url="/docs",
         redoc_url="/redoc",
-        openapi_url="/openapi.json"
+        openapi_url="/openapi.json",
+        lifespan=lifespan,
     )
-    middlewares = [config.config.client_host]
-    if config.config.mode.lower() == "dev":
+    settings = config.get_config()
+    middlewares = [settings.client_host]
+    if settings.mode.lower() == "dev":
         middlewares.extend(["http://localhost:5173", "http://localhost:3000","http://localhost"])
 
     # Add CORS middleware
@@ -44,8 +240,9 @@ def init_app():
         CORSMiddleware,
         allow_origins=middlewares,
         allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+        allow_methods=["GET", "POST", "OPTIONS"],
+        allow_headers=["Content-Type", "Authorization"],
+        max_age=86400,  # Lets browsers cache preflight responses for a day
     )
     return app
 
@@ -54,11 +251,68 @@ app = init_app()
 
 @app.get("/")
 async def root():
-    return {"message": "Hello World"}
+    return Response(ROOT_BODY, media_type="application/json")
+
+
+@lru_cache(maxsize=1)
+def load_evaluator_nodes() -> tuple[type["BaseExecutionNode"], ...]:
+    """
+    Imports the evaluator nodes, in their execution order.
+
+    The evaluators pull in Selenium, LangChain and the LLM SDKs, so they are only imported
+    on first use (or by the background warm-up) rather than when the application starts.
+    """
+    from services.evaluators.connectivity import AccessCheckNode, DriverAccessNode
+    from services.evaluators.html.compliance import HtmlComplianceNode
+    from services.evaluators.html.parser import HtmlParsingNode
+    from services.evaluators.qa.scenarios.execution import TestScenarioExecutionNode
+    from services.evaluators.qa.scenarios.generation import TestScenarioGenerationNode
+    from services.evaluators.qa.ui import UIAnalyzerNode
+
+    return (
+        AccessCheckNode,
+        DriverAccessNode,
+        HtmlParsingNode,
+        HtmlComplianceNode,
+        UIAnalyzerNode,
+        TestScenarioGenerationNode,
+        TestScenarioExecutionNode,
+    )
+
+
+def evaluate_url(url: str, state) -> Iterator["StreamableMessage"]:
+    """
+    Runs the full quality assurance evaluation of a webpage, yielding its messages.
+
+    The evaluation is blocking, it uses the HTTP connection pool and checks out a browser from
+    the pool shared through the application ``state``.
+    """
+    from services.evaluators.base import Orchestrator
+    from services.evaluators.messages import OrchestratorStateMessage
+
+    orch = Orchestrator(
+        [node_cls() for node_cls in load_evaluator_nodes()],
+        max_workers=config.get_config().max_parallel_nodes,
+    )
+
+    with ExitStack() as stack:
+        try:
+            driver = stack.enter_context(
+                state.driver_pool.acquire(config.get_config().browser_acquire_timeout)
+            )
+        except TimeoutError as e:
+            yield OrchestratorStateMessage(
+                message=f"The evaluation could not start: {e} Please retry later.",
+                level="error",
+            )
+            return
+        yield from orch.evaluate(
+            url, create_session(state.http_adapter), driver, driver_pool=state.driver_pool
+        )
 
 
 @app.post("/qa")
-async def provide_quality_assurance(url: UrlRequest):
+async def provide_quality_assurance(url: UrlRequest, request: Request):
     """
     Handles a POST request to perform a quality assurance evaluation of a webpage.
 
@@ -71,39 +325,28 @@ async def provide_quality_assurance(url: UrlRequest):
     """
 
     def generate():
-        connector = AccessCheckNode()
-        html_parsing = HtmlParsingNode()
-        html_compliance = HtmlComplianceNode()
-        test_scenario_generation = TestScenarioGenerationNode()
-        test_scenario_execution = TestScenarioExecutionNode()
-        driver_access = DriverAccessNode()
-        ui_analyzer = UIAnalyzerNode()
-        orch = Orchestrator(
-            [
-                connector,
-                driver_access,
-                html_parsing,
-                html_compliance,
-                ui_analyzer,
-                test_scenario_generation,
-                test_scenario_execution,
-            ]
-        )
+        for msg in evaluate_url(url.url, request.app.state):
+            yield encode_update(msg)
 
-        with requests.Session() as session, create_driver() as driver:
-            session.headers.update(
-                {
-                    "User-Agent": "blackscope/0.1",
-                    "Accept": "text/html,application/xhtml+xml,application/xml",
-                    "Accept-Language": "en-US,en;q=0.5",
-                    "Accept-Encoding": "gzip, deflate",
-                    "Upgrade-Insecure-Requests": "1",
-                }
-            )
-            for msg in orch.evaluate(url.url, session, driver):
-                yield UpdateMessage(type="update", content=msg).model_dump_json() + "\n"
+    return StreamingResponse(
+        coalesce_chunks(stream_from_thread(generate)), media_type="application/x-ndjson"
+    )
+
+
+if EventSourceResponse is not None:
+
+    @app.post("/qa/events", response_class=EventSourceResponse)
+    async def provide_quality_assurance_events(
+        url: UrlRequest, request: Request
+    ) -> AsyncIterator[ServerSentEvent]:
+        """
+        Same evaluation as ``/qa``, streamed as Server-Sent Events of type ``update``.
 
-    return StreamingResponse(generate(), media_type="application/x-ndjson")
+        Events are serialized by FastAPI itself, which also sends keep-alive pings and
+        disables proxy buffering during long evaluations.
+        """
+        async for msg in stream_from_thread(lambda: evaluate_url(url.url, request.app.state)):
+            yield ServerSentEvent(data=msg, event="update")
 
 
 @app.get("/heartbeat")
@@ -113,4 +356,4 @@ async def heartbeat():
 
 @app.get("/health")
 async def health():
-    return {"status": "UP"}
+    return Response(HEALTH_BODY, media_type="application/json")
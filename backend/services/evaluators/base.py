@@ -1,18 +1,30 @@
+import contextvars
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Generator, Any
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Final, Generator, Any, Mapping
 from typing import Sequence
 from selenium.webdriver.remote.webdriver import WebDriver
 import requests
+import weakref
 
 from .errors import NodePreconditionFailure, NodeDependencyFailure
 from .messages import StreamableMessage, StateDetails, OrchestratorStateMessage
 from .returning_generators import ReturningGenerator
 import logging
 
+if TYPE_CHECKING:
+    from .drivers import DriverPool
+
 node_logger = logging.getLogger("evaluators")
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentExecutionArtifact:
     """Represents the execution result and streamed messages of an agent."""
     agent: str
@@ -28,13 +40,16 @@ class NodeExecutionHistory:
     by `AgentExecutionArtifact` instances. It allows adding new results, retrieving
     them, and checking if a specific agent's execution is part of the history.
     """
+    __slots__ = ("_mapper", "_lock")
+
     def __init__(self):
-        self.results: list[AgentExecutionArtifact] = []
+        # Insertion-ordered, so it also records the completion order of the nodes
         self._mapper: dict[str, AgentExecutionArtifact] = {}
+        self._lock = threading.Lock()
 
     def add_result(self, result: AgentExecutionArtifact):
-        self.results.append(result)
-        self._mapper[result.agent] = result
+        with self._lock:  # Nodes may complete concurrently
+            self._mapper[result.agent] = result
 
     def __contains__(self, item) -> bool:
         return item in self._mapper
@@ -42,11 +57,14 @@ class NodeExecutionHistory:
     def __getitem__(self, item) -> AgentExecutionArtifact:
         return self._mapper[item]
 
+    def get(self, item, default=None) -> AgentExecutionArtifact | None:
+        return self._mapper.get(item, default)
+
     def get_results(self) -> list[AgentExecutionArtifact]:
-        return self.results
+        return list(self._mapper.values())
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ContextData:
     """
     Represents the context data used in various operations.
@@ -60,6 +78,26 @@ class ContextData:
     session: requests.Session
     driver: WebDriver
     history: NodeExecutionHistory
+    # Pool from which nodes may check out additional drivers, if any
+    driver_pool: "DriverPool | None" = None
+
+    def ensure_at(self, url: str | None = None):
+        """
+        Navigates the driver to a page, unless it is already displayed.
+
+        Pages differing only by their scheme, fragment or trailing slash are considered the same,
+        so that nodes sharing the driver do not reload the page one after another.
+
+        :param url: The page to display, defaults to the evaluated URL.
+        """
+        url = url or self.url
+        if _page_key(self.driver.current_url) != _page_key(url):
+            self.driver.get(url)
+
+
+# Context of the evaluation currently run by the orchestrator. Nodes fall back to it when
+# they are evaluated without an explicit context, e.g. when a node evaluates another one.
+current_context: contextvars.ContextVar[ContextData] = contextvars.ContextVar("current_context")
 
 
 class BaseExecutionNode:
@@ -72,43 +110,57 @@ class BaseExecutionNode:
     management. Subclasses must implement the `_evaluate_impl` method to define their
     specific evaluation logic.
     """
-    __node_cls_mapper__ = {}
+    # Registry of the node classes by name, classes dropped on module reloads are released
+    __node_cls_mapper__ = weakref.WeakValueDictionary()  # type: weakref.WeakValueDictionary[str, type["BaseExecutionNode"]]
 
     # List of evaluator names or classes that this evaluator depends on
     __dependencies__ = ()  # type: Sequence[str | type["BaseExecutionNode"]]
+    # Names of the dependencies, resolved once when the subclass is defined
+    __dependency_names__ = ()  # type: tuple[str, ...]
+    # Context resources (e.g. "driver") this evaluator needs exclusive access to while running
+    __exclusive_resources__ = ()  # type: Sequence[str]
+
+    def _check_dependencies(self, context: ContextData) -> tuple[bool, str | None]:
+        """
+        Checks that every dependency ran successfully, without raising.
+
+        :return: Whether the node can run, and the reason why it cannot otherwise.
+        """
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug(f"Checking dependencies for {self.node_name}:")
+        for dep_name in self.__dependency_names__:
+            artifact = context.history.get(dep_name)
+            if artifact is None:
+                return False, f"Dependency {dep_name} is required for {self.node_name}."
+            if debug:
+                self.logger.debug(f"Dependency {dep_name} found for {self.node_name}.")
+            if isinstance(artifact.value, NodePreconditionFailure):
+                return False, f"Skipping {self.node_name} since {dep_name} run failed."
+        return True, None
 
     def _ensure_dependencies(self, context: ContextData):
-        self.logger.debug(f"Checking dependencies for {self.node_name}:")
-        for dep in self.__dependencies__:
-            if isinstance(dep, type):
-                if issubclass(dep, BaseExecutionNode):
-                    dep_name = dep.node_name
-                else:
-                    raise NodeDependencyFailure(
-                        "Evaluator dependencies must be strings or subclasses of BaseExecutionNode."
-                    )
-
-            elif isinstance(dep, str):
-                dep_name = dep
-            else:
-                raise NodeDependencyFailure(
-                    "Evaluator dependencies must be strings or subclasses of BaseExecutionNode."
-                )
-            if dep_name not in context.history:
-                raise NodeDependencyFailure(
-                    f"Dependency {dep_name} is required for {self.node_name}."
-                )
-            self.logger.debug(f"Dependency {dep_name} found for {self.node_name}.")
-            result = context.history[dep_name]
-            if isinstance(result, NodePreconditionFailure):
-                raise NodeDependencyFailure(
-                    f"Skipping {self.node_name} since {dep_name} run failed."
-                )
+        ok, reason = self._check_dependencies(context)
+        if not ok:
+            raise NodeDependencyFailure(reason)
 
     def __init__(self, logger=node_logger):
         self.logger = logger
 
+    @staticmethod
+    def _resolve_dependency_name(dep: "str | type[BaseExecutionNode]") -> str:
+        if isinstance(dep, str):
+            return dep
+        if isinstance(dep, type) and issubclass(dep, BaseExecutionNode):
+            return dep.node_name
+        raise NodeDependencyFailure(
+            "Evaluator dependencies must be strings or subclasses of BaseExecutionNode."
+        )
+
     def __init_subclass__(cls, node_name: str | None = None):
+        cls.__dependency_names__ = tuple(
+            cls._resolve_dependency_name(dep) for dep in cls.__dependencies__
+        )
         if node_name is None:
             return
 
@@ -120,6 +172,8 @@ class BaseExecutionNode:
 
         cls.__node_cls_mapper__[node_name] = cls
         cls.node_name = node_name
+        if isinstance(getattr(cls, "full_name"), property):
+            cls.full_name = node_name.replace("_", " ").upper()
 
     def evaluate_without_messages(self, *args, context: ContextData = None, **kwargs) -> Any:
         """
@@ -133,11 +187,15 @@ class BaseExecutionNode:
         :param kwargs: Keyword arguments to pass to the evaluation function.
         :return: The final value yielded by the evaluation generator.
         """
+        if context is None:
+            context = current_context.get(None)
         self._ensure_dependencies(context)
-        gen = self.evaluate(*args, context=context, **kwargs)
-        for _ in gen:
-            pass
-        return gen.value
+        gen = self._evaluate_impl(*args, context=context, **kwargs)
+        try:
+            while True:
+                next(gen)
+        except StopIteration as stop:
+            return stop.value
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
@@ -155,11 +213,14 @@ class BaseExecutionNode:
         returned as a generator.
 
         :param args: Positional arguments required for the evaluation logic.
-        :param context: Optional context data of type ``ContextData`` used for evaluation.
+        :param context: Optional context data of type ``ContextData`` used for evaluation,
+            defaults to the context of the evaluation currently run by the orchestrator.
         :param kwargs: Keyword arguments required for the evaluation logic.
         :return: A generator of providing the streamed messages,
             and the final evaluation result.
         """
+        if context is None:
+            context = current_context.get(None)
         self._ensure_dependencies(context)
         return ReturningGenerator(self._evaluate_impl(*args, context=context, **kwargs))
 
@@ -167,17 +228,44 @@ class BaseExecutionNode:
     def get_node_cls(cls, node_name: str):
         return cls.__node_cls_mapper__.get(node_name)
 
+    def __class_getitem__(cls, node_name: str) -> type["BaseExecutionNode"]:
+        """Looks up a registered node class by name, e.g. ``BaseExecutionNode["html_validator"]``."""
+        return cls.__node_cls_mapper__[node_name]
+
     @classmethod
-    def get_node_instance(cls, node_name: str, *args, **kwargs):
-        return cls.get_node_cls(node_name)(*args, **kwargs)
+    def get_node_instance(cls, node_name: str | type["BaseExecutionNode"], *args, **kwargs):
+        """
+        Instantiates a registered node.
+
+        :param node_name: Name of the node, or its class when it was already looked up.
+        """
+        node_cls = node_name if isinstance(node_name, type) else cls.get_node_cls(node_name)
+        return node_cls(*args, **kwargs)
 
     @property
     def full_name(self):
-        if hasattr(self, "node_name"):
-            return self.node_name.replace("_", " ").upper()
+        # Overridden by a plain class attribute on every registered subclass
         raise ValueError("A default full name requires node_name attribute.")
 
 
+# Read-only view of the registered node classes by name, safe to hand out to any caller
+NAME_TO_CLS: Final[Mapping[str, type[BaseExecutionNode]]] = MappingProxyType(
+    BaseExecutionNode.__node_cls_mapper__
+)
+
+
+@lru_cache(maxsize=4096)
+def _ensure_protocol(url: str) -> str:
+    url = url.strip()
+    return url if url.startswith(("http://", "https://")) else f"https://{url}"
+
+
+@lru_cache(maxsize=4096)
+def _page_key(url: str) -> tuple[str, str, str]:
+    parts = urlsplit(url)
+    return parts.netloc.lower(), parts.path.rstrip("/"), parts.query
+
+
 class Orchestrator:
     """
     Coordinates the orchestration and execution of evaluators based on provided data.
@@ -187,63 +275,206 @@ class Orchestrator:
     history, supports URL normalization, and handles any errors or exceptions raised during
     the evaluation process. This class uses a context-based strategy to manage shared resources
     like HTTP sessions and web drivers during the evaluation.
+
+    Nodes run as soon as their dependencies are done, up to ``max_workers`` of them at the
+    same time. Nodes needing exclusive access to the same resource (e.g. the web driver) never
+    run concurrently. With ``max_workers=1``, nodes run sequentially in the given order.
     """
-    def __init__(self, nodes: list[BaseExecutionNode]):
+    def __init__(self, nodes: list[BaseExecutionNode], max_workers: int = 1):
         """
         Initializes the instance with a list of evaluation nodes.
 
         :param nodes: List of evaluation nodes used for execution.
         :type nodes: list[BaseExecutionNode]
+        :param max_workers: Maximum number of nodes evaluated concurrently.
+        :type max_workers: int
         """
         self.nodes = nodes
+        self.max_workers = max_workers
+        # Start-of-node state messages only differ by their timestamp between runs,
+        # so their content is built once and messages are constructed without validation.
+        self._start_states = [
+            (
+                f"Starting evaluation of {node.node_name}...",
+                StateDetails.model_construct(agent_id=node.node_name, agent_name=node.full_name),
+            )
+            for node in nodes
+        ]
+        # The dependency graph is static, so it is resolved once rather than on every evaluation
+        index_of = {node.node_name: index for index, node in enumerate(nodes)}
+        # Indices of the supplied dependencies of each node, unsupplied ones are left to
+        # the dependency check to report
+        self._dependencies = tuple(
+            tuple(index_of[name] for name in node.__dependency_names__ if name in index_of)
+            for node in nodes
+        )
+        self._plan = self._topological_order()
+
+    def _topological_order(self) -> tuple[int, ...]:
+        """
+        Orders the node indices so that every node comes after its dependencies.
+
+        Declaration order breaks ties. Nodes caught in a dependency cycle are placed last.
+        """
+        dependents: list[list[int]] = [[] for _ in self.nodes]
+        in_degrees = [len(dependencies) for dependencies in self._dependencies]
+        for index, dependencies in enumerate(self._dependencies):
+            for dependency in dependencies:
+                dependents[dependency].append(index)
+        ready = [index for index, degree in enumerate(in_degrees) if degree == 0]
+        order = []
+        while ready:
+            index = heapq.heappop(ready)
+            order.append(index)
+            for dependent in dependents[index]:
+                in_degrees[dependent] -= 1
+                if in_degrees[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) < len(self.nodes):
+            node_logger.warning("Cyclic dependencies found between the orchestrated nodes.")
+            ordered = set(order)
+            order.extend(index for index in range(len(self.nodes)) if index not in ordered)
+        return tuple(order)
+
+    def _start_message(self, index: int) -> OrchestratorStateMessage:
+        start_message, start_details = self._start_states[index]
+        return OrchestratorStateMessage.model_construct(
+            message=start_message, details=start_details
+        )
+
+    def _execute_node(
+        self, node: BaseExecutionNode, context: ContextData, run, *args, **kwargs
+    ) -> Generator[StreamableMessage, None, None]:
+        """
+        Runs a single node, streaming its messages and recording its result in the history.
+
+        :param run: Callable used to step the node, within the context exposing ``current_context``.
+        """
+        name, full_name = node.node_name, node.full_name
+        messages = []
+        ok, reason = node._check_dependencies(context)
+        if not ok:
+            yield StreamableMessage(
+                agent_id=name, agent_name=full_name,
+                level="error", message=reason
+            )
+            context.history.add_result(
+                AgentExecutionArtifact(name, messages, NodeDependencyFailure(reason))
+            )
+            return
+        try:
+            gen = node._evaluate_impl(*args, context=context, **kwargs)
+            while True:
+                try:
+                    message = run(next, gen)
+                except StopIteration as stop:
+                    value = stop.value
+                    break
+                if message.agent_id is None:
+                    message.agent_id = name
+                    message.agent_name = full_name
+                messages.append(message)
+                yield message
+            context.history.add_result(
+                AgentExecutionArtifact(name, messages, value)
+            )
+        except NodePreconditionFailure as err:
+            yield StreamableMessage(
+                agent_id=name, agent_name=full_name,
+                level="error", message=err.message
+            )
+            context.history.add_result(
+                AgentExecutionArtifact(name, messages, err)
+            )
+        except Exception as e:
+            node_logger.exception(e)
+            yield StreamableMessage(
+                agent_id="orchestrator",
+                source="agent",
+                level="error",
+                message=f"{name} failed to run due to an unexpected error. Please contact support..",
+            )
+
+    def _evaluate_sequentially(
+        self, context: ContextData, run, *args, **kwargs
+    ) -> Generator[StreamableMessage, None, None]:
+        for index, node in enumerate(self.nodes):
+            yield self._start_message(index)
+            yield from self._execute_node(node, context, run, *args, **kwargs)
 
-    def _ensure_protocol(self, url: str):
-        url = url.strip()
-        if not url.startswith("http://") and not url.startswith("https://"):
-            return f"https://{url}"
-        return url
+    def _evaluate_concurrently(
+        self, context: ContextData, run, *args, **kwargs
+    ) -> Generator[StreamableMessage, None, None]:
+        # Messages of the running nodes are funneled through this queue, each node ending
+        # its stream with its index once its result is recorded in the history.
+        outbox: queue.Queue[StreamableMessage | int] = queue.Queue()
+        cancelled = threading.Event()
+        pending = list(self._plan)
+        done: set[int] = set()
+        held: set[str] = set()
+        running = 0
+
+        def work(index: int, node_run):
+            try:
+                for message in self._execute_node(self.nodes[index], context, node_run, *args, **kwargs):
+                    if cancelled.is_set():
+                        break
+                    outbox.put(message)
+            finally:
+                outbox.put(index)
+
+        def is_ready(index: int) -> bool:
+            return done.issuperset(self._dependencies[index]) and held.isdisjoint(
+                self.nodes[index].__exclusive_resources__
+            )
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="orchestrator")
+        try:
+            while pending or running:
+                for index in list(pending):
+                    # Unsatisfiable nodes (e.g. cyclic dependencies) are started when nothing runs
+                    if not is_ready(index) and (running or index != pending[0]):
+                        continue
+                    pending.remove(index)
+                    held.update(self.nodes[index].__exclusive_resources__)
+                    running += 1
+                    yield self._start_message(index)
+                    # Each worker steps its node in its own copy of the evaluation's context
+                    pool.submit(work, index, run(contextvars.copy_context).run)
+                item = outbox.get()
+                if isinstance(item, int):
+                    running -= 1
+                    done.add(item)
+                    held.difference_update(self.nodes[item].__exclusive_resources__)
+                else:
+                    yield item
+        finally:
+            # Running nodes stop at their next message, they must not outlive the context
+            cancelled.set()
+            pool.shutdown(wait=True, cancel_futures=True)
 
     def evaluate(
-        self, url: str, session: requests.Session, driver: WebDriver, *args, **kwargs
+        self,
+        url: str,
+        session: requests.Session,
+        driver: WebDriver,
+        *args,
+        driver_pool: "DriverPool | None" = None,
+        **kwargs,
     ) -> Generator[StreamableMessage, None, None]:
         context = ContextData(
-            url=self._ensure_protocol(url),
+            url=_ensure_protocol(url),
             session=session,
             driver=driver,
             history=NodeExecutionHistory(),
+            driver_pool=driver_pool,
         )
-        for node in self.nodes:
-            # Iterates evaluators; yields messages; handles exceptions
-            yield OrchestratorStateMessage(
-                message=f"Starting evaluation of {node.node_name}...",
-                details=StateDetails(agent_id=node.node_name, agent_name=node.full_name),
-            )
-            messages = []
-            try:
-                gen = node.evaluate(*args, context=context, **kwargs)
-                for message in gen:
-                    if message.agent_id is None:
-                        message.agent_id = node.node_name
-                        message.agent_name = node.full_name
-                    messages.append(message)
-                    yield message
-                context.history.add_result(
-                    AgentExecutionArtifact(node.node_name, messages, gen.value)
-                )
-            except NodePreconditionFailure as err:
-                yield StreamableMessage(
-                    agent_id=node.node_name, agent_name=node.full_name,
-                    level="error", message=err.message
-                )
-                context.history.add_result(
-                    AgentExecutionArtifact(node.node_name, messages, err)
-                )
-            except Exception as e:
-                node_logger.exception(e)
-                yield StreamableMessage(
-                    agent_id="orchestrator",
-                    source="agent",
-                    level="error",
-                    message=f"{node.node_name} failed to run due to an unexpected error. Please contact support..",
-                )
+        # Nodes are stepped inside a dedicated context exposing ``current_context``, which
+        # stays correct even if this generator is suspended and resumed elsewhere.
+        run = contextvars.copy_context().run
+        run(current_context.set, context)
+        if self.max_workers > 1:
+            yield from self._evaluate_concurrently(context, run, *args, **kwargs)
+        else:
+            yield from self._evaluate_sequentially(context, run, *args, **kwargs)
         yield OrchestratorStateMessage(message="Evaluation complete.", details=StateDetails(is_end_state=True))
@@ -1,7 +1,10 @@
+from dataclasses import dataclass
 from typing import Generator, Any, Literal
 
 import requests
+from charset_normalizer import from_bytes
 
+import config
 from .base import (
     BaseExecutionNode,
     ContextData,
@@ -9,7 +12,25 @@ from .base import (
 from .errors import NodePreconditionFailure
 from .messages import StreamableMessage
 
-PLAUSIBLE_CONTENT_TYPES = ["text/html", "application/xhtml+xml"]
+PLAUSIBLE_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+# Connect and read timeouts, in seconds, of the requests made to the evaluated website
+REQUEST_TIMEOUT = (5, 30)
+# Bytes requested at once while reading the body of the evaluated page
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass(slots=True, frozen=True)
+class FetchedPage:
+    """
+    The page fetched by the access check, with its body read and decoded once for all the nodes.
+
+    :ivar response: The response of the GET request, already closed, its body is not available.
+    :ivar text: The decoded body, limited to ``MAX_HTML_BYTES``.
+    :ivar truncated: Whether the body was larger than ``MAX_HTML_BYTES``.
+    """
+    response: requests.Response
+    text: str
+    truncated: bool
 
 
 class AccessCheckNode(BaseExecutionNode, node_name="access_check"):
@@ -24,50 +45,86 @@ class AccessCheckNode(BaseExecutionNode, node_name="access_check"):
     :ivar node_name: The name of the node that represents this class.
     :type node_name: str
     """
+    full_name = "Reachability Check"
 
-    def _inspect_content_type(self, response: requests.Response, method: Literal["GET", "OPTIONS"]):
-        if "Content-Type" not in response.headers:
-            yield StreamableMessage(
+    def _inspect_content_type(
+        self, response: requests.Response, method: Literal["GET", "OPTIONS"]
+    ) -> Generator[StreamableMessage, None, str | None]:
+        """Reports issues with the Content-Type header of the response, then returns it."""
+        content_type = response.headers.get("Content-Type")
+        if content_type is None:
+            yield StreamableMessage.fast(
                 message=f"Content-Type header missing in {method} response.", level="bug"
             )
-        else:
-            for content_type in PLAUSIBLE_CONTENT_TYPES:
-                if response.headers["Content-Type"].startswith(content_type):
+        elif not content_type.startswith(PLAUSIBLE_CONTENT_TYPES):
+            yield StreamableMessage.fast(
+                message=f"Invalid Content-Type header in {method} response.", level="error"
+            )
+        return content_type
+
+    @staticmethod
+    def _read_body(response: requests.Response, max_bytes: int) -> tuple[bytes, bool]:
+        """
+        Reads at most ``max_bytes`` of the decompressed body of a streamed response, then releases it.
+
+        :return: The body, and whether it was truncated.
+        """
+        body = bytearray()
+        try:
+            for chunk in response.iter_content(BODY_CHUNK_SIZE):
+                body += chunk
+                if len(body) > max_bytes:
                     break
-            else:
-                yield StreamableMessage(
-                    message=f"Invalid Content-Type header in {method} response.", level="error"
-                )
+        finally:
+            response.close()
+        return bytes(body[:max_bytes]), len(body) > max_bytes
+
+    @staticmethod
+    def _decode_body(response: requests.Response, body: bytes) -> str:
+        """Decodes the body like ``response.text``, detecting the encoding when the headers lack it."""
+        encoding = response.encoding
+        if encoding is None:
+            match = from_bytes(body).best()
+            encoding = match.encoding if match is not None else "utf-8"
+        try:
+            return str(body, encoding, errors="replace")
+        except LookupError:  # Unknown encoding announced by the headers
+            return str(body, errors="replace")
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
-    ) -> Generator[StreamableMessage, None, Any]:
+    ) -> Generator[StreamableMessage, None, FetchedPage]:
         issues = []
-        shake = context.session.options(context.url)
+        shake = context.session.options(context.url, timeout=REQUEST_TIMEOUT)
+        # Only the headers are awaited, the body is read (up to a bound) once they are checked
+        response = context.session.get(context.url, stream=True, timeout=REQUEST_TIMEOUT)
         if not shake.ok:
-            yield StreamableMessage(
+            yield StreamableMessage.fast(
                 message="Failed to pre-fetch the website via OPTIONS.", level="error"
             )
 
-        yield from self._inspect_content_type(shake, "OPTIONS")
-        response = context.session.get(context.url)
+        shake_content_type = yield from self._inspect_content_type(shake, "OPTIONS")
         if not response.ok:
+            response.close()
             raise NodePreconditionFailure("Failed to connect to the website")
         else:
-            yield from self._inspect_content_type(response, "GET")
-            if response.headers["Content-Type"] != shake.headers["Content-Type"]:
-                yield StreamableMessage(
+            content_type = yield from self._inspect_content_type(response, "GET")
+            max_html_bytes = config.get_config().max_html_bytes
+            body, truncated = self._read_body(response, max_html_bytes)
+            if truncated:
+                yield StreamableMessage.fast(
+                    message=f"The page is larger than {max_html_bytes} bytes, only its beginning is analyzed.",
+                    level="warning",
+                )
+            if content_type != shake_content_type:
+                yield StreamableMessage.fast(
                     message="Content-Type header mismatch between pre-fetch and fetch",
                     level="warning",
                 )
-            yield StreamableMessage(
+            yield StreamableMessage.fast(
                 message="Successfully connected to the website.", level="info"
             )
-        return response
-
-    @property
-    def full_name(self):
-        return "Reachability Check"
+        return FetchedPage(response, self._decode_body(response, body), truncated)
 
 
 class DriverAccessNode(BaseExecutionNode, node_name="driver_access"):
@@ -75,6 +132,8 @@ class DriverAccessNode(BaseExecutionNode, node_name="driver_access"):
     Provides access to a web driver for executing actions on a website.
     """
     __dependencies__ = (AccessCheckNode,)
+    __exclusive_resources__ = ("driver",)
+    full_name = "WebDriver Access"
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
@@ -84,7 +143,3 @@ class DriverAccessNode(BaseExecutionNode, node_name="driver_access"):
             message="Successfully loaded the website into AI-powered browser.", level="info"
         )
         return None
-
-    @property
-    def full_name(self):
-        return "WebDriver Access"
\ No newline at end of file
@@ -1,42 +1,190 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Iterator
+
 from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from selenium.webdriver.remote.webdriver import WebDriver
 
 import config
 
-def create_firefox_driver():
-    """Create a headless Firefox WebDriver with typing."""
-    from selenium.webdriver.firefox.options import Options
+driver_logger = logging.getLogger("evaluators.drivers")
+
+@lru_cache(maxsize=1)
+def _firefox_driver_path() -> str:
+    """Resolves (downloading it if needed) the geckodriver executable, once per process."""
     from webdriver_manager.firefox import GeckoDriverManager
-    from selenium.webdriver.firefox.service import Service
 
-    options = Options()
-    options.add_argument(f"--width={config.config.browser_width}")  # ensures proper page layout
-    options.add_argument(f"--height={config.config.browser_height}")
-    if config.config.headless_browser:
-        options.add_argument("--headless")
+    return GeckoDriverManager().install()
 
-    driver = webdriver.Firefox(options=options, service=Service(GeckoDriverManager().install()))
+
+@lru_cache(maxsize=1)
+def _firefox_arguments() -> tuple[str, ...]:
+    settings = config.get_config()
+    arguments = (
+        f"--width={settings.browser_width}",  # ensures proper page layout
+        f"--height={settings.browser_height}",
+    )
+    if settings.headless_browser:
+        arguments += ("--headless",)
+    return arguments
+
+
+def create_firefox_driver():
+    """Create a headless Firefox WebDriver with typing."""
+    options = FirefoxOptions()
+    for argument in _firefox_arguments():
+        options.add_argument(argument)
+
+    driver = webdriver.Firefox(options=options, service=FirefoxService(_firefox_driver_path()))
     return driver
 
 
-def create_chrome_driver():
-    from selenium.webdriver.chrome.options import Options
+@lru_cache(maxsize=1)
+def _chrome_driver_path() -> str:
+    """Resolves (downloading it if needed) the chromedriver executable, once per process."""
     from webdriver_manager.chrome import ChromeDriverManager
-    from selenium.webdriver.chrome.service import Service
-
-    options = Options()
-    if config.config.headless_browser:
-        options.add_argument("--headless=new")  # modern headless
-    options.add_argument("--disable-gpu")  # often recommended
-    options.add_argument(f"--window-size={config.config.browser_width},{config.config.browser_height}")  # ensures proper page layout
-    options.add_argument("--no-sandbox")  # useful in Linux CI
-    options.add_argument("--disable-dev-shm-usage")  # avoid memory issues
-    driver = webdriver.Chrome(options=options, service=Service(ChromeDriverManager().install()))
+
+    return ChromeDriverManager().install()
+
+
+@lru_cache(maxsize=1)
+def _chrome_arguments() -> tuple[str, ...]:
+    settings = config.get_config()
+    arguments = ()
+    if settings.headless_browser:
+        arguments += ("--headless=new",)  # modern headless
+    return arguments + (
+        "--disable-gpu",  # often recommended
+        f"--window-size={settings.browser_width},{settings.browser_height}",  # ensures proper page layout
+        "--no-sandbox",  # useful in Linux CI
+        "--disable-dev-shm-usage",  # avoid memory issues
+    )
+
+
+def create_chrome_driver():
+    options = ChromeOptions()
+    for argument in _chrome_arguments():
+        options.add_argument(argument)
+    driver = webdriver.Chrome(options=options, service=ChromeService(_chrome_driver_path()))
     return driver
 
 def create_driver():
-    match config.config.browser_driver:
+    match config.get_config().browser_driver:
         case "firefox":
             return create_firefox_driver()
         case "chrome":
             return create_chrome_driver()
-    raise ValueError(f"Unsupported browser type: {config.config.browser_driver}")
\ No newline at end of file
+    raise ValueError(f"Unsupported browser type: {config.get_config().browser_driver}")
+
+
+class DriverPool:
+    """
+    Keeps a bounded set of WebDriver instances alive so they can be reused across evaluations.
+
+    Launching a browser takes seconds, which dominates the latency of short evaluations. The
+    pool keeps at most ``size`` drivers alive, blocking further callers until one is
+    returned. Returned drivers are reset (cookies cleared, blank page loaded) before being
+    reused; a driver that cannot be reset is considered dead and is quit instead.
+
+    :ivar size: Maximum number of drivers alive at the same time.
+    """
+
+    def __init__(self, size: int = 1, factory: Callable[[], WebDriver] = create_driver):
+        self.size = size
+        self.factory = factory
+        self._idle: queue.LifoQueue[WebDriver] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._alive = 0
+        self._closed = False
+
+    def _reserve(self) -> bool:
+        """Reserves room for a new driver, if the pool is not full."""
+        with self._lock:
+            if self._alive >= self.size:
+                return False
+            self._alive += 1
+            return True
+
+    def _launch(self) -> WebDriver:
+        """Launches a driver in a previously reserved room."""
+        try:
+            return self.factory()
+        except BaseException:
+            with self._lock:
+                self._alive -= 1
+            raise
+
+    def warm_up(self):
+        """Launches drivers until the pool holds ``size`` instances."""
+        while not self._closed and self._reserve():
+            driver = self._launch()
+            if self._closed:  # Closed while launching
+                self._release(driver)
+                break
+            self._idle.put(driver)
+
+    def _checkout(self, timeout: float | None) -> WebDriver:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._reserve():
+                return self._launch()
+            # Full pool, wait for a driver to be released (or launched by the warm-up)
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                raise TimeoutError(f"No browser became available within {timeout} seconds.")
+            try:
+                return self._idle.get(timeout=wait)
+            except queue.Empty:
+                continue
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[WebDriver]:
+        """
+        Checks a driver out of the pool for the duration of the ``with`` block.
+
+        :param timeout: Maximum time in seconds to wait for a driver, waits indefinitely if None.
+        :raises TimeoutError: If no driver became available in time.
+        """
+        driver = self._checkout(timeout)
+        try:
+            yield driver
+        finally:
+            self._release(driver)
+
+    def _release(self, driver: WebDriver):
+        if not self._closed:
+            try:
+                driver.delete_all_cookies()
+                driver.get("about:blank")
+            except Exception as e:
+                driver_logger.warning(f"Discarding unusable driver: {e}")
+            else:
+                self._idle.put(driver)
+                return
+        with self._lock:
+            self._alive -= 1
+        driver.quit()
+
+    def close(self):
+        """Quits every idle driver. Drivers still checked out are quit when released."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._alive -= 1
+            driver.quit()
@@ -1,4 +1,4 @@
-class NodePreconditionFailure(BaseException):
+class NodePreconditionFailure(Exception):
     """
     Raised when a process fails due to unrecoverable input issues
     that cannot be circumvented, making it pointless to proceed with the execution.
@@ -1,11 +1,324 @@
-from typing import Generator, Any
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Generator, Any, Iterator, NamedTuple
 from bs4 import BeautifulSoup, Tag
+import copy
 import re
 
 from ..base import BaseExecutionNode, ContextData
 from ..errors import NodeAssertionFailure
 from ..messages import StreamableMessage, Metric, MetricsList, MetricsMessage
 from ..connectivity import AccessCheckNode
+from .documents import DOCTYPE_PATTERN, get_soup
+
+# lxml inserts the missing structural tags while parsing, so they are looked up in the raw document
+STRUCTURAL_TAG_PATTERNS = {
+    tag_name: re.compile(rf"<{tag_name}\b", re.IGNORECASE) for tag_name in ("html", "head", "body")
+}
+
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+# Ordered, so that the deprecation messages keep a stable order
+DEPRECATED_TAGS = ("center", "font", "marquee", "blink", "frame", "frameset")
+# Input types which do not need a label
+UNLABELED_INPUT_TYPES = frozenset({"hidden", "submit", "button"})
+
+UNSAFE_SCRIPT_PATTERN = re.compile(r"eval\s*\(|document\.write\s*\(")
+JAVASCRIPT_HREF_PATTERN = re.compile(r"^javascript:", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class _Document:
+    """The parsed document and the facts gathered by the single walk, read by the compliance rules."""
+    html_content: str
+    url: str
+    soup: BeautifulSoup
+    has_tag: dict[str, bool]
+    tags_by_name: defaultdict[str, list[Tag]]
+    ids: list[str]
+    tags_with_style: list[Tag]
+    # Declarations made by the <meta> tags, among "charset", "viewport" and "csp"
+    meta_declarations: frozenset[str]
+    # The parsed document is shared with the other nodes, so the corrections are
+    # recorded as (tag, attribute, value) and applied to a copy at the end
+    corrections: list[tuple[Tag, str, str]] = field(default_factory=list)
+    # Kinds of corrections, for the final report
+    corrections_made: set[str] = field(default_factory=set)
+
+    def correct(self, tags: list[Tag], attribute: str, value: str, description: str):
+        self.corrections.extend((tag, attribute, value) for tag in tags)
+        self.corrections_made.add(description)
+
+
+# Each rule yields the template arguments of every issue it finds
+
+def _missing_doctype(document: _Document) -> Iterator[dict]:
+    if not DOCTYPE_PATTERN.match(document.html_content):
+        yield {}
+
+
+def _missing_structural_tags(document: _Document) -> Iterator[dict]:
+    for tag_name, present in document.has_tag.items():
+        if not present:
+            yield {"tag_name": tag_name}
+
+
+def _meta_declarations(meta_tags: list[Tag]) -> frozenset[str]:
+    """Scans the <meta> tags once for the charset, viewport and CSP declarations."""
+    declarations = set()
+    for meta in meta_tags:
+        if "charset" in meta.attrs:
+            declarations.add("charset")
+        if meta.get("name") == "viewport":
+            declarations.add("viewport")
+        http_equiv = meta.get("http-equiv")
+        if http_equiv == "Content-Type":
+            declarations.add("charset")
+        elif http_equiv == "Content-Security-Policy":
+            declarations.add("csp")
+    return frozenset(declarations)
+
+
+def _missing_charset(document: _Document) -> Iterator[dict]:
+    if "charset" not in document.meta_declarations:
+        yield {}
+
+
+def _missing_viewport(document: _Document) -> Iterator[dict]:
+    if "viewport" not in document.meta_declarations:
+        yield {}
+
+
+def _missing_title(document: _Document) -> Iterator[dict]:
+    title = document.soup.title
+    if not title or not title.string or not title.string.strip():
+        yield {}
+
+
+def _unsafe_inline_script(document: _Document) -> Iterator[dict]:
+    for script in document.tags_by_name["script"]:
+        if "src" not in script.attrs and script.string and UNSAFE_SCRIPT_PATTERN.search(script.string):
+            yield {}
+            break
+
+
+def _missing_csp(document: _Document) -> Iterator[dict]:
+    if "csp" not in document.meta_declarations:
+        yield {}
+
+
+def _images_without_alt(document: _Document) -> Iterator[dict]:
+    images_without_alt = [img for img in document.tags_by_name["img"] if "alt" not in img.attrs]
+    if images_without_alt:
+        document.correct(images_without_alt, "alt", "", "Added empty alt attributes to images")
+        yield {"count": len(images_without_alt)}
+
+
+def _javascript_links(document: _Document) -> Iterator[dict]:
+    suspicious_links = [
+        link for link in document.tags_by_name["a"]
+        if isinstance(link.get("href"), str) and JAVASCRIPT_HREF_PATTERN.search(link["href"])
+    ]
+    if suspicious_links:
+        yield {"count": len(suspicious_links)}
+
+
+def _rel_list(link: Tag) -> list[str]:
+    """Returns the rel values of a link as a new list, leaving the attribute of the shared document intact."""
+    rel_values = link.get("rel") or []
+    return rel_values.split() if isinstance(rel_values, str) else list(rel_values)
+
+
+def _unsafe_external_links(document: _Document) -> Iterator[dict]:
+    unsafe_external_links = 0
+    for link in document.tags_by_name["a"]:
+        if link.get("target") != "_blank":
+            continue
+        rel_values = _rel_list(link)
+        if "noopener" not in rel_values:
+            rel_values.append("noopener")
+            document.correct([link], "rel", " ".join(rel_values), "Added rel='noopener' to external links")
+            unsafe_external_links += 1
+    if unsafe_external_links:
+        yield {"count": unsafe_external_links}
+
+
+def _deprecated_tags(document: _Document) -> Iterator[dict]:
+    for tag_name in DEPRECATED_TAGS:
+        deprecated = document.tags_by_name[tag_name]
+        if deprecated:
+            yield {"tag_name": tag_name, "count": len(deprecated)}
+
+
+def _forms_without_action(document: _Document) -> Iterator[dict]:
+    forms_without_action = [form for form in document.tags_by_name["form"] if "action" not in form.attrs]
+    if forms_without_action:
+        yield {"count": len(forms_without_action)}
+
+
+def _inputs_without_labels(document: _Document) -> Iterator[dict]:
+    inputs = [
+        inp for inp in document.tags_by_name["input"]
+        if inp.get("type") not in UNLABELED_INPUT_TYPES
+    ]
+    labels = document.tags_by_name["label"]
+    # Ids referenced by labels, so that each input is matched in constant time
+    labelled_ids = {label.get("for") for label in labels}
+    # Tags wrapped in a label, by identity, rather than walking up the ancestors of each input
+    wrapped_tags = {id(tag) for label in labels for tag in label.descendants}
+    inputs_without_labels = []
+    for inp in inputs:
+        input_id = inp.get("id")
+        if (not input_id or input_id not in labelled_ids) and id(inp) not in wrapped_tags:
+            inputs_without_labels.append(inp)
+    if inputs_without_labels:
+        yield {"count": len(inputs_without_labels)}
+
+
+def _duplicate_ids(document: _Document) -> Iterator[dict]:
+    for dup_id, count in Counter(document.ids).items():
+        if count > 1:
+            yield {"id": dup_id, "count": count}
+
+
+def _mixed_content(document: _Document) -> Iterator[dict]:
+    # Without any "http://" in the raw document, no resource can be loaded insecurely
+    if not document.url.startswith("https://") or "http://" not in document.html_content:
+        return
+    http_resources = []
+    for tag_name in ("img", "script", "link", "iframe"):
+        for tag in document.tags_by_name[tag_name]:
+            src = tag.get("src") or tag.get("href")
+            if src and src.startswith("http://"):
+                http_resources.append(src)
+    if http_resources:
+        yield {"count": len(http_resources)}
+
+
+def _inline_styles(document: _Document) -> Iterator[dict]:
+    if len(document.tags_with_style) > 10:
+        yield {"count": len(document.tags_with_style)}
+
+
+def _missing_lang(document: _Document) -> Iterator[dict]:
+    html_tag = document.soup.html if document.has_tag["html"] else None
+    if html_tag and not html_tag.get("lang"):
+        document.correct([html_tag], "lang", "en", "Added lang='en' to html tag")
+        yield {}
+
+
+def _empty_headings(document: _Document) -> Iterator[dict]:
+    for heading_name in HEADING_TAGS:
+        empty_headings = [h for h in document.tags_by_name[heading_name] if not h.get_text(strip=True)]
+        if empty_headings:
+            yield {"tag_name": heading_name, "count": len(empty_headings)}
+
+
+def _tables_without_headers(document: _Document) -> Iterator[dict]:
+    for table in document.tags_by_name["table"]:
+        if not table.find("th") and not table.find("caption"):
+            yield {}
+            break
+
+
+def _iframes_without_title(document: _Document) -> Iterator[dict]:
+    iframes_without_title = [
+        iframe for iframe in document.tags_by_name["iframe"] if "title" not in iframe.attrs
+    ]
+    if iframes_without_title:
+        document.correct(iframes_without_title, "title", "Embedded content", "Added title to iframes")
+        yield {"count": len(iframes_without_title)}
+
+
+class ComplianceRule(NamedTuple):
+    check: Callable[[_Document], Iterator[dict]]
+    category: str
+    level: str
+    template: str
+
+
+# The compliance rules, in reporting order
+COMPLIANCE_RULES: tuple[ComplianceRule, ...] = (
+    ComplianceRule(
+        _missing_doctype, "Structure", "improvement",
+        "Missing DOCTYPE declaration. Modern HTML should include <!DOCTYPE html>.",
+    ),
+    ComplianceRule(
+        _missing_structural_tags, "Structure", "bug",
+        "Missing <{tag_name}> tag. Document structure is incomplete.",
+    ),
+    ComplianceRule(
+        _missing_charset, "Best Practices", "improvement",
+        "Missing charset declaration. Add <meta charset='UTF-8'> in <head> to prevent encoding issues.",
+    ),
+    ComplianceRule(
+        _missing_viewport, "Best Practices", "improvement",
+        "Missing viewport meta tag. Add <meta name='viewport' content='width=device-width, initial-scale=1.0'> for mobile responsiveness.",
+    ),
+    ComplianceRule(
+        _missing_title, "Best Practices", "warning",
+        "Missing or empty <title> tag. Every page should have a descriptive title.",
+    ),
+    ComplianceRule(
+        _unsafe_inline_script, "Security", "vulnerability",
+        "Potentially unsafe inline JavaScript using eval() or document.write(). This can lead to XSS vulnerabilities.",
+    ),
+    ComplianceRule(
+        _missing_csp, "Security", "improvement",
+        "No Content Security Policy (CSP) meta tag found. Consider adding CSP to mitigate XSS attacks.",
+    ),
+    ComplianceRule(
+        _images_without_alt, "Accessibility", "warning",
+        "Found {count} image(s) without 'alt' attributes. This impacts accessibility and SEO.",
+    ),
+    ComplianceRule(
+        _javascript_links, "Security", "vulnerability",
+        "Found {count} link(s) using 'javascript:' protocol. This can be a security risk and accessibility issue.",
+    ),
+    ComplianceRule(
+        _unsafe_external_links, "Security", "vulnerability",
+        "Found {count} link(s) with target='_blank' without rel='noopener'. This can lead to security vulnerabilities (tabnabbing).",
+    ),
+    ComplianceRule(
+        _deprecated_tags, "Best Practices", "warning",
+        "Found deprecated <{tag_name}> tag(s) ({count} occurrence(s)). Use CSS instead.",
+    ),
+    ComplianceRule(
+        _forms_without_action, "Structure", "bug",
+        "Found {count} form(s) without 'action' attribute.",
+    ),
+    ComplianceRule(
+        _inputs_without_labels, "Accessibility", "warning",
+        "Found {count} input field(s) without associated labels. This impacts accessibility.",
+    ),
+    ComplianceRule(
+        _duplicate_ids, "Structure", "bug",
+        "Duplicate ID '{id}' found {count} times. IDs must be unique.",
+    ),
+    ComplianceRule(
+        _mixed_content, "Security", "vulnerability",
+        "Found {count} HTTP resource(s) on HTTPS page. This can cause mixed content warnings and security issues.",
+    ),
+    ComplianceRule(
+        _inline_styles, "Best Practices", "improvement",
+        "Found {count} elements with inline styles. Consider using external CSS for better maintainability.",
+    ),
+    ComplianceRule(
+        _missing_lang, "Accessibility", "warning",
+        "Missing 'lang' attribute on <html> tag. This helps screen readers and search engines.",
+    ),
+    ComplianceRule(
+        _empty_headings, "Accessibility", "warning",
+        "Found {count} empty <{tag_name}> tag(s). Empty headings confuse screen readers.",
+    ),
+    ComplianceRule(
+        _tables_without_headers, "Accessibility", "warning",
+        "Table found without header cells (<th>) or caption. This impacts accessibility.",
+    ),
+    ComplianceRule(
+        _iframes_without_title, "Accessibility", "warning",
+        "Found {count} iframe(s) without 'title' attribute. This impacts accessibility.",
+    ),
+)
 
 
 class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
@@ -16,6 +329,21 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
     ready for further processing. The results are delivered via streamable messages.
     """
     __dependencies__ = (AccessCheckNode.node_name,)
+    full_name = "HTML Compliance Assessment"
+
+    @staticmethod
+    def _corrected_copy(
+        soup: BeautifulSoup, corrections: list[tuple[Tag, str, str]]
+    ) -> BeautifulSoup:
+        """Applies the attribute corrections to a copy of the document, leaving it untouched."""
+        corrections_by_tag = defaultdict(list)
+        for tag, attribute, value in corrections:
+            corrections_by_tag[id(tag)].append((attribute, value))
+        corrected = copy.copy(soup)  # Copies the tree as-is, in the same order
+        for original, clone in zip(soup.descendants, corrected.descendants):
+            for attribute, value in corrections_by_tag.get(id(original), ()):
+                clone[attribute] = value
+        return corrected
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
@@ -25,20 +353,61 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
         Returns corrected HTML for further analysis.
         """
 
-        response = context.history[AccessCheckNode.node_name].value
-        if not response or not response.ok:
+        page = context.history[AccessCheckNode.node_name].value
+        if not page or not page.response.ok:
             yield StreamableMessage(
                 message="Cannot validate HTML: response unavailable or failed.",
                 level="error",
             )
             return None
 
+        # JSON, plain text and other payloads would only raise false structural issues
+        content_type = page.response.headers.get("Content-Type", "").lower()
+        if content_type and "html" not in content_type and "xml" not in content_type:
+            yield StreamableMessage(
+                message=f"The page is not an HTML document ({content_type}), compliance checks were skipped.",
+                level="info",
+            )
+            return None
+
         try:
-            html_content = response.text
-            soup = BeautifulSoup(html_content, "html.parser")
+            html_content = page.text
+            # Documents without any markup (empty bodies, plain "OK" stubs) are not parsed
+            if "<" not in html_content:
+                yield StreamableMessage(
+                    message="The page has no HTML markup, compliance checks were skipped.",
+                    level="warning",
+                )
+                return html_content
 
-            # Track corrections for corrected HTML output
-            corrections_made = []
+            soup = get_soup(page.response, html_content)
+
+            # Single traversal of the document, bucketing the tags inspected by the rules
+            tags_by_name: defaultdict[str, list[Tag]] = defaultdict(list)
+            ids: list[str] = []
+            tags_with_style: list[Tag] = []
+            for tag in soup.descendants:
+                if not isinstance(tag, Tag):
+                    continue
+                tags_by_name[tag.name].append(tag)
+                if "id" in tag.attrs:
+                    ids.append(tag["id"])
+                if "style" in tag.attrs:
+                    tags_with_style.append(tag)
+
+            document = _Document(
+                html_content=html_content,
+                url=context.url,
+                soup=soup,
+                has_tag={
+                    tag_name: pattern.search(html_content) is not None
+                    for tag_name, pattern in STRUCTURAL_TAG_PATTERNS.items()
+                },
+                tags_by_name=tags_by_name,
+                ids=ids,
+                tags_with_style=tags_with_style,
+                meta_declarations=_meta_declarations(tags_by_name["meta"]),
+            )
             # Track issues by category for final assessment
             issues_by_category = {
                 "Structure": [],
@@ -46,218 +415,25 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
                 "Accessibility": [],
                 "Best Practices": [],
             }
-
-            # 1. Check for missing DOCTYPE
-            if not html_content.strip().lower().startswith("<!doctype"):
-                msg = "Missing DOCTYPE declaration. Modern HTML should include <!DOCTYPE html>."
-                yield StreamableMessage(message=msg, level="improvement")
-                issues_by_category["Structure"].append(msg)
-
-            # 2. Check for html, head, and body tags
-            if not soup.html:
-                msg = "Missing <html> tag. Document structure is incomplete."
-                yield StreamableMessage(message=msg, level="bug")
-                issues_by_category["Structure"].append(msg)
-            if not soup.head:
-                msg = "Missing <head> tag. Document structure is incomplete."
-                yield StreamableMessage(message=msg, level="bug")
-                issues_by_category["Structure"].append(msg)
-            if not soup.body:
-                msg = "Missing <body> tag. Document structure is incomplete."
-                yield StreamableMessage(message=msg, level="bug")
-                issues_by_category["Structure"].append(msg)
-
-            # 3. Check for charset declaration
-            meta_charset = soup.find("meta", charset=True) or soup.find(
-                "meta", attrs={"http-equiv": "Content-Type"}
-            )
-            if not meta_charset:
-                msg = "Missing charset declaration. Add <meta charset='UTF-8'> in <head> to prevent encoding issues."
-                yield StreamableMessage(message=msg, level="improvement")
-                issues_by_category["Best Practices"].append(msg)
-
-            # 4. Check for viewport meta tag (mobile responsiveness)
-            if not soup.find("meta", attrs={"name": "viewport"}):
-                msg = "Missing viewport meta tag. Add <meta name='viewport' content='width=device-width, initial-scale=1.0'> for mobile responsiveness."
-                yield StreamableMessage(message=msg, level="improvement")
-                issues_by_category["Best Practices"].append(msg)
-
-            # 5. Check for title tag
-            if not soup.title or not soup.title.string or not soup.title.string.strip():
-                msg = "Missing or empty <title> tag. Every page should have a descriptive title."
-                yield StreamableMessage(message=msg, level="warning")
-                issues_by_category["Best Practices"].append(msg)
-
-            # 6. Security: Check for inline JavaScript (XSS vulnerability)
-            inline_scripts = soup.find_all("script", src=False)
-            for script in inline_scripts:
-                if script.string and re.search(r"eval\s*\(|document\.write\s*\(", script.string):
-                    msg = "Potentially unsafe inline JavaScript using eval() or document.write(). This can lead to XSS vulnerabilities."
-                    yield StreamableMessage(message=msg, level="vulnerability")
-                    issues_by_category["Security"].append(msg)
-                    break
-
-            # 7. Security: Check for missing Content Security Policy
-            csp_meta = soup.find("meta", attrs={"http-equiv": "Content-Security-Policy"})
-            if not csp_meta:
-                msg = "No Content Security Policy (CSP) meta tag found. Consider adding CSP to mitigate XSS attacks."
-                yield StreamableMessage(message=msg, level="improvement")
-                issues_by_category["Security"].append(msg)
-
-            # 8. Check for images without alt attributes (accessibility)
-            images_without_alt = soup.find_all("img", alt=False)
-            if images_without_alt:
-                msg = f"Found {len(images_without_alt)} image(s) without 'alt' attributes. This impacts accessibility and SEO."
-                yield StreamableMessage(message=msg, level="warning")
-                issues_by_category["Accessibility"].append(msg)
-                # Add alt attributes to corrections
-                for img in images_without_alt:
-                    img["alt"] = ""
-                    corrections_made.append("Added empty alt attributes to images")
-
-            # 9. Check for links without href or with javascript: protocol (security)
-            suspicious_links = soup.find_all("a", href=re.compile(r"^javascript:", re.I))
-            if suspicious_links:
-                msg = f"Found {len(suspicious_links)} link(s) using 'javascript:' protocol. This can be a security risk and accessibility issue."
-                yield StreamableMessage(message=msg, level="vulnerability")
-                issues_by_category["Security"].append(msg)
-
-            # 10. Check for external links without rel="noopener" or rel="noreferrer"
-            external_links = soup.find_all("a", target="_blank")
-            unsafe_external_links = [
-                link
-                for link in external_links
-                if not link.get("rel") or "noopener" not in link.get("rel", [])
-            ]
-            if unsafe_external_links:
-                msg = f"Found {len(unsafe_external_links)} link(s) with target='_blank' without rel='noopener'. This can lead to security vulnerabilities (tabnabbing)."
-                yield StreamableMessage(message=msg, level="vulnerability")
-                issues_by_category["Security"].append(msg)
-                # Fix external links
-                for link in unsafe_external_links:
-                    rel_values = link.get("rel", [])
-                    if isinstance(rel_values, str):
-                        rel_values = rel_values.split()
-                    if "noopener" not in rel_values:
-                        rel_values.append("noopener")
-                    link["rel"] = " ".join(rel_values)
-                    corrections_made.append("Added rel='noopener' to external links")
-
-            # 11. Check for deprecated HTML tags
-            deprecated_tags = ["center", "font", "marquee", "blink", "frame", "frameset"]
-            for tag_name in deprecated_tags:
-                deprecated = soup.find_all(tag_name)
-                if deprecated:
-                    msg = f"Found deprecated <{tag_name}> tag(s) ({len(deprecated)} occurrence(s)). Use CSS instead."
-                    yield StreamableMessage(message=msg, level="warning")
-                    issues_by_category["Best Practices"].append(msg)
-
-            # 12. Check for forms without action attribute
-            forms_without_action = soup.find_all("form", action=False)
-            if forms_without_action:
-                msg = f"Found {len(forms_without_action)} form(s) without 'action' attribute."
-                yield StreamableMessage(message=msg, level="bug")
-                issues_by_category["Structure"].append(msg)
-
-            # 13. Check for input fields without labels (accessibility)
-            inputs = soup.find_all("input", type=lambda t: t not in ["hidden", "submit", "button"])
-            inputs_without_labels = []
-            for inp in inputs:
-                input_id = inp.get("id")
-                if not input_id or not soup.find("label", attrs={"for": input_id}):
-                    # Check if input is wrapped in a label
-                    parent_label = inp.find_parent("label")
-                    if not parent_label:
-                        inputs_without_labels.append(inp)
-
-            if inputs_without_labels:
-                msg = f"Found {len(inputs_without_labels)} input field(s) without associated labels. This impacts accessibility."
-                yield StreamableMessage(message=msg, level="warning")
-                issues_by_category["Accessibility"].append(msg)
-
-            # 14. Check for duplicate IDs
-            ids = {}
-            for tag in soup.find_all(id=True):
-                tag_id = tag.get("id")
-                if tag_id in ids:
-                    ids[tag_id] += 1
-                else:
-                    ids[tag_id] = 1
-
-            duplicate_ids = {k: v for k, v in ids.items() if v > 1}
-            if duplicate_ids:
-                for dup_id, count in duplicate_ids.items():
-                    msg = f"Duplicate ID '{dup_id}' found {count} times. IDs must be unique."
-                    yield StreamableMessage(message=msg, level="bug")
-                    issues_by_category["Structure"].append(msg)
-
-            # 15. Check for mixed content (HTTP resources on HTTPS pages)
-            if context.url.startswith("https://"):
-                http_resources = []
-                for tag in soup.find_all(["img", "script", "link", "iframe"]):
-                    src = tag.get("src") or tag.get("href")
-                    if src and src.startswith("http://"):
-                        http_resources.append(src)
-
-                if http_resources:
-                    msg = f"Found {len(http_resources)} HTTP resource(s) on HTTPS page. This can cause mixed content warnings and security issues."
-                    yield StreamableMessage(message=msg, level="vulnerability")
-                    issues_by_category["Security"].append(msg)
-
-            # 16. Check for inline styles (maintainability)
-            inline_styles = soup.find_all(style=True)
-            if len(inline_styles) > 10:
-                msg = f"Found {len(inline_styles)} elements with inline styles. Consider using external CSS for better maintainability."
-                yield StreamableMessage(message=msg, level="improvement")
-                issues_by_category["Best Practices"].append(msg)
-
-            # 17. Check for missing language attribute
-            html_tag = soup.find("html")
-            if html_tag and not html_tag.get("lang"):
-                msg = "Missing 'lang' attribute on <html> tag. This helps screen readers and search engines."
-                yield StreamableMessage(message=msg, level="warning")
-                issues_by_category["Accessibility"].append(msg)
-                # Add lang attribute
-                html_tag["lang"] = "en"
-                corrections_made.append("Added lang='en' to html tag")
-
-            # 18. Check for empty heading tags
-            for i in range(1, 7):
-                empty_headings = [h for h in soup.find_all(f"h{i}") if not h.get_text(strip=True)]
-                if empty_headings:
-                    msg = f"Found {len(empty_headings)} empty <h{i}> tag(s). Empty headings confuse screen readers."
-                    yield StreamableMessage(message=msg, level="warning")
-                    issues_by_category["Accessibility"].append(msg)
-
-            # 19. Check for tables without proper structure
-            tables = soup.find_all("table")
-            for table in tables:
-                if not table.find("th") and not table.find("caption"):
-                    msg = "Table found without header cells (<th>) or caption. This impacts accessibility."
-                    yield StreamableMessage(message=msg, level="warning")
-                    issues_by_category["Accessibility"].append(msg)
-                    break
-
-            # 20. Check for iframes without title
-            iframes_without_title = soup.find_all("iframe", title=False)
-            if iframes_without_title:
-                msg = f"Found {len(iframes_without_title)} iframe(s) without 'title' attribute. This impacts accessibility."
-                yield StreamableMessage(message=msg, level="warning")
-                issues_by_category["Accessibility"].append(msg)
-                # Add title to iframes
-                for iframe in iframes_without_title:
-                    iframe["title"] = "Embedded content"
-                    corrections_made.append("Added title to iframes")
-
-            # Calculate scores for each category
-            total_issues = sum(len(issues) for issues in issues_by_category.values())
+            for check, category, level, template in COMPLIANCE_RULES:
+                # The category is looked up once per rule rather than once per issue
+                record_issue = issues_by_category[category].append
+                for found in check(document):
+                    msg = template.format_map(found)
+                    yield StreamableMessage(message=msg, level=level)
+                    record_issue(msg)
+
+            # Calculate scores for each category, counting the total along the way
+            total_issues = 0
             category_metrics = []
 
             for category, issues in issues_by_category.items():
-                if issues:
+                issue_count = len(issues)
+                total_issues += issue_count
+                if issue_count:
                     # Score decreases with more issues (max 100, min 0)
-                    score = max(0, 100 - len(issues) * 10)
-                    feedback = f"{len(issues)} issue(s) found in {category}"
+                    score = max(0, 100 - issue_count * 10)
+                    feedback = f"{issue_count} issue(s) found in {category}"
                 else:
                     score = 100
                     feedback = f"No issues found in {category}"
@@ -267,7 +443,7 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
                         name=category,
                         score=score,
                         feedback=feedback,
-                        issues=issues if issues else None
+                        issues=issues or None
                     )
                 )
 
@@ -287,10 +463,12 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
             )
 
             # Generate corrected HTML if corrections were made
-            if corrections_made:
-                corrected_html = str(soup.prettify())
+            if document.corrections_made:
+                corrected_html = self._corrected_copy(soup, document.corrections).decode(
+                    formatter="minimal"
+                )
                 yield StreamableMessage(
-                    message=f"Applied {len(set(corrections_made))} type(s) of corrections to HTML.",
+                    message=f"Applied {len(document.corrections_made)} type(s) of corrections to HTML.",
                     level="info",
                 )
                 return corrected_html
@@ -303,7 +481,3 @@ class HtmlComplianceNode(BaseExecutionNode, node_name="html_compliance"):
         except Exception as e:
             self.logger.exception(e)
             raise NodeAssertionFailure(f"Failed to parse HTML: {str(e)}")
-
-    @property
-    def full_name(self):
-        return "HTML Compliance Assessment"
\ No newline at end of file
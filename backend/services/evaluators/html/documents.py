@@ -0,0 +1,94 @@
+import html
+import re
+import threading
+import weakref
+from dataclasses import dataclass
+
+import requests
+from bs4 import BeautifulSoup, FeatureNotFound
+
+# Length of the text preview of the page, given to the LLM agents
+TEXT_PREVIEW_LENGTH = 1000
+
+# Matched at the start of the document, without copying it to strip or lowercase it
+DOCTYPE_PATTERN = re.compile(r"\s*<!doctype", re.IGNORECASE)
+
+# Parsed documents, by the response they were derived from
+_soups: "weakref.WeakKeyDictionary[requests.Response, BeautifulSoup]" = weakref.WeakKeyDictionary()
+# Tree building holds the GIL anyway, a single lock costs no parallelism and
+# avoids doing the work twice
+_cache_lock = threading.Lock()
+
+
+def parse_html(html_content: str) -> BeautifulSoup:
+    """Parses the document with lxml, falling back to the pure-Python parser if lxml is unavailable."""
+    try:
+        return BeautifulSoup(html_content, "lxml")
+    except FeatureNotFound:
+        return BeautifulSoup(html_content, "html.parser")
+
+
+def get_soup(response: requests.Response, html_content: str) -> BeautifulSoup:
+    """
+    Returns the parsed document of a response, parsing it only once for all the nodes.
+
+    The returned tree is shared, nodes must not modify it (copy it first if needed).
+
+    :param response: The response whose body is parsed.
+    :param html_content: The decoded body of the response.
+    :return: The parsed document.
+    """
+    with _cache_lock:
+        soup = _soups.get(response)
+        if soup is None:
+            soup = _soups[response] = parse_html(html_content)
+        return soup
+
+
+def extract_text_preview(soup: BeautifulSoup, max_length: int = TEXT_PREVIEW_LENGTH) -> str:
+    """
+    Returns the beginning of the stripped text of a document.
+
+    Equivalent to ``soup.get_text(strip=True)[:max_length]``, but stops walking the document
+    once enough text is gathered instead of concatenating the text of the whole page.
+    """
+    parts = []
+    length = 0
+    for string in soup.stripped_strings:
+        parts.append(string)
+        length += len(string)
+        if length >= max_length:
+            break
+    return "".join(parts)[:max_length]
+
+
+@dataclass(slots=True, frozen=True)
+class ParsedDocument:
+    """
+    The parsed page, along with the artifacts derived from it once for all the consumers.
+
+    :ivar soup: The shared document tree, which must not be modified.
+    :ivar text_preview: The beginning of the stripped text of the page.
+    :ivar title: The stripped content of the <title> tag, if any.
+    """
+    soup: BeautifulSoup
+    text_preview: str
+    title: str | None
+
+    @classmethod
+    def from_soup(cls, soup: BeautifulSoup) -> "ParsedDocument":
+        title = soup.title.string if soup.title else None
+        return cls(
+            soup=soup,
+            text_preview=extract_text_preview(soup),
+            title=title.strip() if title else None,
+        )
+
+    @classmethod
+    def from_text(cls, text: str) -> "ParsedDocument":
+        """Builds the document of a body without markup, without parsing it."""
+        return cls(
+            soup=parse_html(""),
+            text_preview=html.unescape(text).strip()[:TEXT_PREVIEW_LENGTH],
+            title=None,
+        )
@@ -1,3 +1,5 @@
+from collections import Counter
+from html.parser import HTMLParser
 from typing import Generator, Any
 from bs4 import BeautifulSoup, Tag
 import re
@@ -6,6 +8,110 @@ from ..base import BaseExecutionNode, ContextData
 from ..errors import NodeAssertionFailure
 from ..messages import StreamableMessage
 from ..connectivity import AccessCheckNode
+from .documents import DOCTYPE_PATTERN, ParsedDocument, get_soup
+
+# Resource-bearing tags, with their attributes which must not be left empty
+RESOURCE_ATTRIBUTES = {
+    **dict.fromkeys(("a", "area", "base", "link"), "href"),
+    **dict.fromkeys(
+        ("img", "script", "iframe", "source", "video", "audio", "track", "embed", "input"), "src"
+    ),
+    "form": "action",
+}
+# Raw text elements, with the end tag their content must not contain
+CLOSING_TAG_CHECKS = {
+    tag_name: re.compile(rf"</{tag_name}>", re.IGNORECASE) for tag_name in ("script", "style")
+}
+# Comment delimiters, an abruptly closed comment (<!--> or <!--->) opens and closes at once
+COMMENT_DELIMITER_PATTERN = re.compile(r"<!--(-?>)?|-->")
+
+# Block elements which cannot appear inside a <p>
+BLOCK_TAGS = frozenset({"div", "section", "article", "aside", "header", "footer"})
+# Elements without content, which are never left open
+VOID_TAGS = frozenset(
+    {
+        "area", "base", "br", "col", "embed", "hr", "img", "input",
+        "link", "meta", "param", "source", "track", "wbr",
+    }
+)
+
+NESTED_PARAGRAPH = "<p> nested inside <p>"
+NESTED_BLOCK = "Block element nested inside <p>"
+NESTED_LINK = "<a> nested inside <a>"
+NESTING_ISSUES = (NESTED_PARAGRAPH, NESTED_BLOCK, NESTED_LINK)
+# Characters fed at once to the nesting scanner
+NESTING_SCAN_CHUNK_SIZE = 64 * 1024
+# The nesting scanner tokenizes the document a second time, in pure Python, it is limited to
+# the beginning of large documents (about a third of the lxml parse time on a 2 MB page otherwise)
+NESTING_SCAN_MAX_LENGTH = 256 * 1024
+
+
+class _NestingScanner(HTMLParser):
+    """
+    Detects invalid nesting from the tags as written in the document.
+
+    lxml repairs the nesting while building the tree (a <p> is closed before a nested <div>),
+    so the issues are looked up in the token stream instead, without building a second tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._open_tags: list[str] = []
+        self._open_counts: Counter[str] = Counter()
+        # Ordered and deduplicated
+        self.issues: dict[str, None] = {}
+
+    def handle_starttag(self, tag, attrs):
+        if self._open_counts["p"]:
+            if tag == "p":
+                self.issues[NESTED_PARAGRAPH] = None
+            elif tag in BLOCK_TAGS:
+                self.issues[NESTED_BLOCK] = None
+        if tag == "a" and self._open_counts["a"]:
+            self.issues[NESTED_LINK] = None
+        if tag not in VOID_TAGS:
+            self._open_tags.append(tag)
+            self._open_counts[tag] += 1
+
+    def handle_endtag(self, tag):
+        # Closes the element along with the ones left open inside it, stray end tags are ignored
+        if not self._open_counts[tag]:
+            return
+        while (closed := self._open_tags.pop()) != tag:
+            self._open_counts[closed] -= 1
+        self._open_counts[tag] -= 1
+
+
+def comments_balanced(html_content: str) -> bool:
+    """Tells whether every comment opened in the document is closed, scanning it once."""
+    balance = 0
+    for delimiter in COMMENT_DELIMITER_PATTERN.finditer(html_content):
+        if delimiter.group(1) is None:
+            balance += 1 if delimiter.group().startswith("<") else -1
+    return balance == 0
+
+
+def find_invalid_nesting(
+    html_content: str, max_length: int = NESTING_SCAN_MAX_LENGTH
+) -> list[str]:
+    """
+    Lists the kinds of invalid nesting found in the document, in order of first occurrence.
+
+    :param html_content: The HTML document.
+    :param max_length: Number of characters scanned at the beginning of the document.
+    :return: The descriptions of the invalid nesting issues.
+    """
+    scanner = _NestingScanner()
+    # Fed incrementally, so that the scan stops as soon as every kind of issue was found
+    for start in range(0, min(len(html_content), max_length), NESTING_SCAN_CHUNK_SIZE):
+        end = min(start + NESTING_SCAN_CHUNK_SIZE, max_length)
+        scanner.feed(html_content[start:end])
+        if len(scanner.issues) == len(NESTING_ISSUES):
+            break
+    else:
+        if len(html_content) <= max_length:
+            scanner.close()
+    return list(scanner.issues)
 
 
 class HtmlParsingNode(BaseExecutionNode, node_name="html_validator"):
@@ -15,128 +121,135 @@ class HtmlParsingNode(BaseExecutionNode, node_name="html_validator"):
     Only checks for problems that impact HTML parsing, not accessibility or best practices.
     """
     __dependencies__ = (AccessCheckNode,)
+    full_name = "HTML Syntax Check"
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
-    ) -> Generator[StreamableMessage, None, bs4.BeautifulSoup]:
+    ) -> Generator[StreamableMessage, None, ParsedDocument]:
         """
         Validates HTML for issues that can affect parsing.
         Only checks for problems that impact HTML parsing, not accessibility or best practices.
         """
         # Get response from connectivity validator
 
-        response = context.history[AccessCheckNode.node_name].value
-        if not response or not response.ok:
-            yield StreamableMessage(
+        page = context.history[AccessCheckNode.node_name].value
+        if not page or not page.response.ok:
+            yield StreamableMessage.fast(
                 message="Cannot validate HTML: response unavailable or failed.",
                 level="error",
             )
             return None
 
         try:
-            html_content = response.text
+            html_content = page.text
 
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(html_content, "html.parser")
+            # Documents without any markup (JSON error pages, plain "OK" stubs) have no syntax
+            # to check, nor any tree worth parsing, only their text is returned
+            if "<" not in html_content:
+                yield StreamableMessage.fast(
+                    message="The page has no HTML markup, syntax checks were skipped.",
+                    level="warning",
+                )
+                return ParsedDocument.from_text(html_content)
+
+            # Parse HTML with lxml, the tree is shared with the other HTML nodes
+            soup = get_soup(page.response, html_content)
+
+            # Single traversal of the document, gathering the facts inspected by the checks
+            ids = Counter()
+            empty_attributes = []
+            improperly_closed = Counter()
+            forms_without_action = 0
+            tables_with_loose_rows = 0
+            for tag in soup.descendants:
+                if not isinstance(tag, Tag):
+                    continue
+                name = tag.name
+                attrs = tag.attrs
+                if "id" in attrs:
+                    ids[attrs["id"]] += 1
+                attr_name = RESOURCE_ATTRIBUTES.get(name)
+                if attr_name in attrs and not attrs[attr_name]:
+                    empty_attributes.append((attr_name, name))
+                if name in CLOSING_TAG_CHECKS:
+                    if tag.string and CLOSING_TAG_CHECKS[name].search(tag.string):
+                        improperly_closed[name] += 1
+                elif name == "form":
+                    if "action" not in attrs:
+                        forms_without_action += 1
+                elif name == "table":
+                    # Stops at the first loose row, without going through the bs4 matcher
+                    if any(child.name == "tr" for child in tag.children if isinstance(child, Tag)):
+                        tables_with_loose_rows += 1
 
             # 1. Check for duplicate IDs (affects DOM parsing and querySelector)
-            ids = {}
-            for tag in soup.find_all(id=True):
-                tag_id = tag.get("id")
-                if tag_id in ids:
-                    ids[tag_id] += 1
-                else:
-                    ids[tag_id] = 1
-
-            duplicate_ids = {k: v for k, v in ids.items() if v > 1}
-            if duplicate_ids:
-                for dup_id, count in duplicate_ids.items():
-                    yield StreamableMessage(
+            for dup_id, count in ids.items():
+                if count > 1:
+                    yield StreamableMessage.fast(
                         message=f"Duplicate ID '{dup_id}' found {count} times. IDs must be unique for proper DOM parsing.",
                         level="bug",
                     )
 
             # 2. Check for invalid nesting that affects parsing
-            invalid_nesting = []
-            for p_tag in soup.find_all("p"):
-                if p_tag.find("p"):
-                    invalid_nesting.append("<p> nested inside <p>")
-                if p_tag.find(["div", "section", "article", "aside", "header", "footer"]):
-                    invalid_nesting.append("Block element nested inside <p>")
-
-            for a_tag in soup.find_all("a"):
-                if a_tag.find("a"):
-                    invalid_nesting.append("<a> nested inside <a>")
-
+            invalid_nesting = find_invalid_nesting(html_content)
             if invalid_nesting:
-                unique_issues = set(invalid_nesting)
-                for issue in unique_issues:
-                    yield StreamableMessage(
+                for issue in invalid_nesting:
+                    yield StreamableMessage.fast(
                         message=f"Invalid nesting detected: {issue}. This can cause parsing issues.",
                         level="bug",
                     )
+            if len(html_content) > NESTING_SCAN_MAX_LENGTH:
+                yield StreamableMessage.fast(
+                    message=f"Invalid nesting was only checked in the first "
+                    f"{NESTING_SCAN_MAX_LENGTH // 1024} KiB of the page.",
+                    level="info",
+                )
 
             # 3. Check for malformed attributes that affect parsing
-            for tag in soup.find_all(True):
-                for attr_name in tag.attrs:
-                    if attr_name in ["href", "src", "action"] and not tag[attr_name]:
-                        yield StreamableMessage(
-                            message=f"Empty '{attr_name}' attribute on <{tag.name}> tag may cause parsing issues.",
-                            level="warning",
-                        )
+            for attr_name, tag_name in empty_attributes:
+                yield StreamableMessage.fast(
+                    message=f"Empty '{attr_name}' attribute on <{tag_name}> tag may cause parsing issues.",
+                    level="warning",
+                )
 
             # 4. Check for incorrect DOCTYPE or missing DOCTYPE
-            if not html_content.strip().lower().startswith("<!doctype"):
-                yield StreamableMessage(
+            if not DOCTYPE_PATTERN.match(html_content):
+                yield StreamableMessage.fast(
                     message="Missing DOCTYPE declaration. Browsers may use quirks mode which affects HTML parsing.",
                     level="warning",
                 )
 
             # 5. Check for unclosed comment blocks
-            if "<!--" in html_content and html_content.count("<!--") != html_content.count("-->"):
-                yield StreamableMessage(
+            if not comments_balanced(html_content):
+                yield StreamableMessage.fast(
                     message="Mismatched HTML comment tags (<!-- and -->). This can cause content to be hidden.",
                     level="bug",
                 )
 
             # 6. Check for script/style tags that might be improperly closed
-            for script in soup.find_all("script"):
-                if script.string and "</script>" in script.string.lower():
-                    yield StreamableMessage(
-                        message="<script> tag contains '</script>' in its content. This will prematurely close the script tag.",
-                        level="bug",
-                    )
-
-            for style in soup.find_all("style"):
-                if style.string and "</style>" in style.string.lower():
-                    yield StreamableMessage(
-                        message="<style> tag contains '</style>' in its content. This will prematurely close the style tag.",
+            for tag_name in CLOSING_TAG_CHECKS:
+                for _ in range(improperly_closed[tag_name]):
+                    yield StreamableMessage.fast(
+                        message=f"<{tag_name}> tag contains '</{tag_name}>' in its content. This will prematurely close the {tag_name} tag.",
                         level="bug",
                     )
 
             # 7. Check for forms without action (affects form parsing)
-            forms_without_action = soup.find_all("form", action=False)
             if forms_without_action:
-                yield StreamableMessage(
-                    message=f"Found {len(forms_without_action)} form(s) without 'action' attribute. This may affect form submission parsing.",
+                yield StreamableMessage.fast(
+                    message=f"Found {forms_without_action} form(s) without 'action' attribute. This may affect form submission parsing.",
                     level="warning",
                 )
 
             # 8. Check for tables with improper structure (affects table parsing)
-            for table in soup.find_all("table"):
-                trs_outside_tbody_thead_tfoot = [tr for tr in table.find_all("tr", recursive=False)]
-                if trs_outside_tbody_thead_tfoot:
-                    yield StreamableMessage(
-                        message="Table has <tr> elements directly under <table> without <tbody>. Browsers will auto-insert <tbody> affecting DOM structure.",
-                        level="warning",
-                    )
+            for _ in range(tables_with_loose_rows):
+                yield StreamableMessage.fast(
+                    message="Table has <tr> elements directly under <table> without <tbody>. Browsers will auto-insert <tbody> affecting DOM structure.",
+                    level="warning",
+                )
 
-            yield StreamableMessage(message="HTML parsing validation completed.", level="info")
-            return soup
+            yield StreamableMessage.fast(message="HTML parsing validation completed.", level="info")
+            return ParsedDocument.from_soup(soup)
 
         except Exception as e:
             raise NodeAssertionFailure(f"Failed to parse HTML: {str(e)}")
-
-    @property
-    def full_name(self):
-        return "HTML Syntax Check"
\ No newline at end of file
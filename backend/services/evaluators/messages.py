@@ -1,11 +1,16 @@
 import datetime
-from functools import partial
 from typing import Literal, Any
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 from services.llm.agents import TestExecutionReport
 
+_UTC = datetime.timezone.utc
+
+
+def _utc_now() -> datetime.datetime:
+    return datetime.datetime.now(_UTC)
+
 
 class StreamableMessage(BaseModel):
     """
@@ -28,7 +33,17 @@ class StreamableMessage(BaseModel):
         "bug", "vulnerability", "malicious", "success"
     ] = "info"
     details: Any = None
-    timestamp: datetime.datetime = Field(default_factory=partial(datetime.datetime.now,tz=datetime.timezone.utc))
+    timestamp: datetime.datetime = Field(default_factory=_utc_now)
+
+    @classmethod
+    def fast(cls, **fields: Any) -> "StreamableMessage":
+        """
+        Builds a message from known-valid fields, without validating them.
+
+        Meant for messages emitted in bulk with constant fields, the defaults (timestamp
+        included) are still applied.
+        """
+        return cls.model_construct(**fields)
 
 
 class StateDetails(BaseModel):
@@ -81,6 +96,8 @@ class Metric(BaseModel):
 
     This class encapsulates a metric with a name, score, and optional feedback, issues, and improvements.
     """
+    model_config = ConfigDict(frozen=True)
+
     name: str
     score: int | None = None
     feedback: str | None = None
@@ -97,6 +114,8 @@ class MetricsList(BaseModel):
     contexts where metrics are analyzed and tracked alongside optional descriptive
     feedback and scoring.
     """
+    model_config = ConfigDict(frozen=True)
+
     name : str | None = None
     metrics: list[Metric]
     feedback: str | None = None
@@ -1,12 +1,19 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack
 from typing import Generator, Literal
 
+from selenium.webdriver.remote.webdriver import WebDriver
+
+import config
 from services.evaluators.base import BaseExecutionNode, ContextData
 from services.evaluators.messages import StreamableMessage, StateDetails, OrchestratorStateMessage, \
     AgentAssessmentMessage, TestExecutionReportMessage
 from services.evaluators.connectivity import DriverAccessNode
 from services.evaluators.qa.scenarios.generation import TestScenarioGenerationNode
 from services.llm.agents import (
+    create_scenario_execution_agent,
     invoke_scenario_execution_agent,
+    resolve_chat_model,
     TestExecutionResult,
     TestExecutionReport,
     TestScenarioList,
@@ -22,81 +29,139 @@ class TestScenarioExecutionNode(BaseExecutionNode, node_name="scenario_execution
     and analyzes their outcomes to produce a detailed execution report. The class
     relies on dependencies like `DriverAccessNode` and `TestScenarioGenerationNode`
     to fetch necessary data and interact with the test execution environment.
+
+    Scenarios are executed concurrently when idle browsers can be checked out of the
+    driver pool, each running scenario owning its own browser.
     """
     __dependencies__ = (DriverAccessNode, TestScenarioGenerationNode)
+    __exclusive_resources__ = ("driver",)
+    full_name = "Test Scenario Execution"
+
+    def _acquire_extra_drivers(self, context: ContextData, count: int) -> dict[WebDriver, ExitStack]:
+        """
+        Checks up to ``count`` additional drivers out of the pool.
+
+        Browsers used by other evaluations are not waited for, fewer scenarios run at once instead.
+        Each driver comes with the stack returning it to the pool when closed.
+        """
+        drivers = {}
+        if context.driver_pool is None:
+            return drivers
+        for _ in range(count):
+            release = ExitStack()
+            try:
+                driver = release.enter_context(context.driver_pool.acquire(timeout=0))
+            except TimeoutError:
+                break
+            except Exception as e:
+                self.logger.warning(f"Failed to launch an additional browser: {e}")
+                break
+            drivers[driver] = release
+        return drivers
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
     ) -> Generator[StreamableMessage, None, TestExecutionReport]:
-        if not context.driver.current_url.endswith(
-            context.url
-        ):  # (Heuristic to reload page if URL has changed)
-            context.driver.get(context.url)  # Reload URL if necessary
-
-        results = []
-        passed = 0
-        failed = 0
-        errors = 0
+        context.ensure_at()  # Reload URL if necessary
 
         scenarios_list: TestScenarioList = context.history[
             TestScenarioGenerationNode.node_name
         ].value
+        scenarios = scenarios_list.scenarios
+        # Results are reported in the order of the scenarios, whatever their completion order
+        results: list[TestExecutionResult | None] = [None] * len(scenarios)
+        # A single client for all the scenarios, which reuse its connections to the provider
+        model = resolve_chat_model(DEFAULT_MODEL)
+        # Agents are built once per browser, and reused by all the scenarios it runs
+        agents = {}
 
-        for scenario in scenarios_list.scenarios:
-            try:
-                yield OrchestratorStateMessage(
-                    message=f"Executing scenario {scenario.name}...",
-                    details=StateDetails(
-                        agent_id=self.node_name,
-                        agent_name=self.full_name,
-                        scenario_id=scenario.short_name,
-                        scenario_name=scenario.name
-                    ),
-                   )
-                result = invoke_scenario_execution_agent(
-                    context.driver, scenario, context.url, DEFAULT_MODEL
-                )
-                results.append(result)
-                level: Literal["error", "success"] = "error"
-                if result.status == "PASSED":
-                    passed += 1
-                    level = "success"
-                elif result.status == "FAILED":
-                    failed += 1
-                elif result.status == "ERROR":
-                    errors += 1
-                yield StreamableMessage(
-                    message=result.execution_details,
-                    level="info",
-                    scenario_id=scenario.short_name,
-                    scenario_name=scenario.name,
-                )
-                yield AgentAssessmentMessage(
-                    message=f"Scenario {scenario.name} completed: {result.status}", level=level,
-                    scenario_id=scenario.short_name,
-                    scenario_name=scenario.name,
-                )
+        max_workers = min(config.get_config().max_parallel_scenarios, len(scenarios))
+        extra_drivers = self._acquire_extra_drivers(context, max_workers - 1)
+        free_drivers = [context.driver, *extra_drivers]
+        executor = ThreadPoolExecutor(max_workers=len(free_drivers), thread_name_prefix="scenario")
+        # A scenario is only submitted once a browser is free, so that it is announced
+        # when it actually starts. With a single browser, scenarios run one after another.
+        pending: dict[Future, tuple[int, WebDriver]] = {}
+        try:
+            agent_id, agent_name = self.node_name, self.full_name
+            remaining = iter(enumerate(scenarios))
+            while True:
+                while free_drivers and (item := next(remaining, None)) is not None:
+                    index, scenario = item
+                    driver = free_drivers.pop()
+                    yield OrchestratorStateMessage(
+                        message=f"Executing scenario {scenario.name}...",
+                        details=StateDetails(
+                            agent_id=agent_id,
+                            agent_name=agent_name,
+                            scenario_id=scenario.short_name,
+                            scenario_name=scenario.name
+                        ),
+                       )
+                    agent = agents.get(driver)
+                    if agent is None:
+                        agent = agents[driver] = create_scenario_execution_agent(driver, model)
+                    future = executor.submit(
+                        invoke_scenario_execution_agent, driver, scenario, context.url, model,
+                        agent=agent,
+                    )
+                    pending[future] = (index, driver)
+                if not pending:
+                    break
 
-            except Exception as e:
-                # If execution completely fails, create an error result
-                yield AgentAssessmentMessage(
-                    message=f"A crash occurred during scenario {scenario.name}.", level="error",
-                    scenario_id=scenario.short_name
-                )
-                error_result = TestExecutionResult(
-                    scenario_name=scenario.name,
-                    status="ERROR",
-                    execution_details=f"Failed to execute scenario: {str(e)}",
-                    errors_encountered=[str(e)],
-                )
-                results.append(error_result)
-                errors += 1
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index, driver = pending.pop(future)
+                    free_drivers.append(driver)
+                    scenario = scenarios[index]
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # If execution completely fails, create an error result
+                        yield AgentAssessmentMessage(
+                            message=f"A crash occurred during scenario {scenario.name}.", level="error",
+                            scenario_id=scenario.short_name
+                        )
+                        results[index] = TestExecutionResult(
+                            scenario_name=scenario.name,
+                            status="ERROR",
+                            execution_details=f"Failed to execute scenario: {str(e)}",
+                            errors_encountered=[str(e)],
+                        )
+                        continue
 
+                    results[index] = result
+                    level: Literal["error", "success"] = "success" if result.status == "PASSED" else "error"
+                    yield StreamableMessage(
+                        message=result.execution_details,
+                        level="info",
+                        scenario_id=scenario.short_name,
+                        scenario_name=scenario.name,
+                    )
+                    yield AgentAssessmentMessage(
+                        message=f"Scenario {scenario.name} completed: {result.status}", level=level,
+                        scenario_id=scenario.short_name,
+                        scenario_name=scenario.name,
+                    )
+        finally:
+            # Scenarios not started yet are dropped, the running ones cannot be interrupted (when
+            # the evaluation is aborted). Their additional browsers go back to the pool as each of
+            # them completes, only the evaluation's own browser, released by the caller, is waited for.
+            executor.shutdown(wait=False, cancel_futures=True)
+            for future, (_, driver) in pending.items():
+                release = extra_drivers.pop(driver, None)
+                if release is not None:
+                    future.add_done_callback(lambda _, release=release: release.close())
+            for release in extra_drivers.values():
+                release.close()
+            wait([future for future, (_, driver) in pending.items() if driver is context.driver])
+
+        statuses = [result.status for result in results]
         final_report=TestExecutionReport(
-            total_scenarios=len(scenarios_list.scenarios),
-            passed=passed,
-            failed=failed,
-            errors=errors,
+            total_scenarios=len(scenarios),
+            passed=statuses.count("PASSED"),
+            failed=statuses.count("FAILED"),
+            errors=statuses.count("ERROR"),
             results=results,
         )
 
@@ -104,7 +169,3 @@ class TestScenarioExecutionNode(BaseExecutionNode, node_name="scenario_execution
             message="Test Scenario Execution Complete.", details=final_report
         )
         return final_report
-
-    @property
-    def full_name(self):
-        return "Test Scenario Execution"
\ No newline at end of file
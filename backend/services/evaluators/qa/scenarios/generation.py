@@ -5,12 +5,10 @@ import requests
 from services.evaluators.base import BaseExecutionNode, ContextData
 from services.evaluators.messages import StreamableMessage, TestScenariosMessage
 from services.evaluators.connectivity import DriverAccessNode, AccessCheckNode
+from services.evaluators.html.documents import ParsedDocument
 from services.evaluators.html.parser import HtmlParsingNode
 from services.llm.agents import invoke_scenario_generation_agent
 from services.llm.models import DEFAULT_MODEL
-import bs4
-
-MAX_CONTENT_LENGTH = 1000
 
 
 class TestScenarioGenerationNode(BaseExecutionNode, node_name="scenario_generation"):
@@ -22,23 +20,23 @@ class TestScenarioGenerationNode(BaseExecutionNode, node_name="scenario_generati
     to produce test scenarios.
     """
     __dependencies__ = (DriverAccessNode, HtmlParsingNode)
+    __exclusive_resources__ = ("driver",)
+    full_name = "Test Scenario Generation"
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
     ) -> Generator[StreamableMessage, None, Any]:
-        if not context.driver.current_url.endswith(
-            context.url
-        ):  # (Heuristic to reload page if URL has changed)
-            context.driver.get(context.url)  # Reload URL if necessary
-        soup: bs4.BeautifulSoup = context.history[HtmlParsingNode.node_name].value
+        context.ensure_at()  # Reload URL if necessary
+        document: ParsedDocument = context.history[HtmlParsingNode.node_name].value
 
-        text_content = soup.get_text(strip=True)[:MAX_CONTENT_LENGTH]
+        text_content = document.text_preview
         result = invoke_scenario_generation_agent(
             driver=context.driver,
             url=context.url,
             title=context.driver.title,
             content=text_content,
             model=DEFAULT_MODEL,
+            navigate=False,  # Already at the URL
         )
 
         yield TestScenariosMessage(
@@ -46,7 +44,3 @@ class TestScenarioGenerationNode(BaseExecutionNode, node_name="scenario_generati
         )
 
         return result
-
-    @property
-    def full_name(self):
-        return "Test Scenario Generation"
\ No newline at end of file
@@ -8,7 +8,7 @@ from services.llm.agents import (
     TestExecutionReport,
     invoke_ui_analyzer_agent, UIQualityAssessment,
 )
-from services.llm.models import DEFAULT_MODEL, DEFAULT_VL_MODEL, get_vl_model
+from services.llm.models import DEFAULT_PARSE_MODEL, DEFAULT_VL_MODEL
 
 
 class UIAnalyzerNode(BaseExecutionNode, node_name="ui_analyzer"):
@@ -22,16 +22,16 @@ class UIAnalyzerNode(BaseExecutionNode, node_name="ui_analyzer"):
     reloads the page when necessary, providing high accuracy in assessment results.
     """
     __dependencies__ = (DriverAccessNode,)
+    __exclusive_resources__ = ("driver",)
+    full_name = "UI Quality Assessment"
 
     def _evaluate_impl(
         self, *args, context: ContextData = None, **kwargs
     ) -> Generator[StreamableMessage, None, UIQualityAssessment]:
-        if not context.driver.current_url.endswith(
-            context.url
-        ):  # (Heuristic to reload page if URL has changed)
-            context.driver.get(context.url)  # Reload URL if necessary
+        context.ensure_at()  # Reload URL if necessary
 
-        results=invoke_ui_analyzer_agent(context.driver, vl_model=get_vl_model(),model=DEFAULT_MODEL)
+        # The VL model is created by the agent, while the screenshot is being captured
+        results=invoke_ui_analyzer_agent(context.driver, model=DEFAULT_PARSE_MODEL)
         yield MetricsMessage(
             message="UI Quality Assessment",
             details=MetricsList(
@@ -48,7 +48,3 @@ class UIAnalyzerNode(BaseExecutionNode, node_name="ui_analyzer"):
             )
         )
         return results
-
-    @property
-    def full_name(self):
-        return "UI Quality Assessment"
\ No newline at end of file
@@ -1,15 +1,22 @@
-from typing import List, Optional, cast
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Literal, NamedTuple, Optional, cast
 
+from huggingface_hub.errors import HfHubHTTPError
 from langchain.agents import create_agent
 from langchain.chat_models import init_chat_model
+from langchain_core.exceptions import OutputParserException
 from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import Runnable
 from langchain_core.tools import BaseTool
-from pydantic import BaseModel, Field
+from openai import APIStatusError
+from pydantic import BaseModel, Field, ValidationError
 from selenium.webdriver.remote.webdriver import WebDriver
 
-from .models import get_vl_model, DEFAULT_MODEL
+from .models import get_vl_model, DEFAULT_MODEL, DEFAULT_PARSE_MODEL, DEFAULT_VL_MODEL
 from .prompt_manager import get_prompt_manager
+import re
 import time
 import io
 import base64
@@ -36,6 +43,99 @@ class TestScenarioList(BaseModel):
     scenarios: List[TestScenario] = Field(description="List of test scenarios")
 
 
+@lru_cache(maxsize=32)
+def render_static_prompt(template_name: str) -> str:
+    """Renders a template without variables, such as the system prompts, once per process."""
+    return get_prompt_manager().render(template_name)
+
+
+# Chat model classes whose providers only cache a prompt prefix when it is explicitly marked.
+# Others (OpenAI, DeepSeek, ...) cache repeated prefixes automatically.
+EXPLICIT_PROMPT_CACHING_MODELS = ("ChatAnthropic", "ChatAnthropicVertex", "ChatBedrock", "ChatBedrockConverse")
+
+
+def create_system_message(model: BaseChatModel, content: str) -> SystemMessage:
+    """
+    Creates a system message whose static content is cached by the provider across invocations.
+
+    The checkpoint closes the system block, so that the scenario-specific human message that
+    follows stays outside the cached prefix.
+    """
+    if type(model).__name__ in EXPLICIT_PROMPT_CACHING_MODELS:
+        return SystemMessage(
+            content=[{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
+        )
+    return SystemMessage(content=content)
+
+
+@lru_cache(maxsize=8)
+def _init_chat_model_cached(model_name: str) -> BaseChatModel:
+    return init_chat_model(model_name)
+
+
+def resolve_chat_model(model: BaseChatModel | str) -> BaseChatModel:
+    """
+    Returns the chat model itself, or the instance initialized from its name.
+
+    Models given by name are initialized once per process, so that every invocation shares
+    the same client, and thus its open connections to the provider.
+    """
+    if isinstance(model, str):
+        model = _init_chat_model_cached(model)
+    return model
+
+
+# Structured output runnables, by model instance (chat models are not hashable), schema and options.
+# The model is kept alongside, so that its id cannot be reused while the entry exists.
+_structured_models: dict[tuple, tuple[BaseChatModel, Runnable]] = {}
+_STRUCTURED_MODELS_MAX_SIZE = 32
+
+
+def get_structured_model(model: BaseChatModel, schema: type[BaseModel], **kwargs) -> Runnable:
+    """
+    Returns ``model.with_structured_output(schema, **kwargs)``, built once per model and schema.
+
+    Building it converts the Pydantic schema to a JSON schema and binds it to the model, which
+    is wasted work when the same shared model is asked for the same schema on every call.
+    """
+    key = (id(model), schema, *sorted(kwargs.items()))
+    cached = _structured_models.get(key)
+    if cached is None:
+        if len(_structured_models) >= _STRUCTURED_MODELS_MAX_SIZE:
+            _structured_models.clear()
+        cached = _structured_models[key] = (model, model.with_structured_output(schema, **kwargs))
+    return cached[1]
+
+
+def invoke_validated(structured_llm: Runnable, prompt: str, max_retries: int = 2):
+    """
+    Invokes a structured output model, asking it again when its answer does not match the schema.
+
+    The validation error is appended to the prompt of the retries, so that the model can fix
+    its answer. The happy path costs a single call.
+
+    Args:
+        structured_llm: A model bound to a schema, by get_structured_model
+        prompt: The prompt of the model
+        max_retries: Maximum number of calls made after the first one
+    Returns:
+        The parsed answer of the model
+    Raises:
+        ValidationError, OutputParserException: If the last answer still does not match the schema
+    """
+    attempt_prompt = prompt
+    for attempt in range(max_retries + 1):
+        try:
+            return structured_llm.invoke(attempt_prompt)
+        except (ValidationError, OutputParserException) as e:
+            if attempt == max_retries:
+                raise
+            attempt_prompt = (
+                f"{prompt}\n\nPrevious output failed schema validation: {e}\n"
+                "Return valid JSON matching the schema."
+            )
+
+
 def create_scenario_generation_prompt(
     url: str, title: str, content: str, max_length: int = 5000
 ) -> str:
@@ -68,6 +168,8 @@ def invoke_scenario_generation_agent(
     content: str,
     model: BaseChatModel | str,
     tools: list[BaseTool] = None,
+    navigate: bool = True,
+    parse_model: BaseChatModel | str = DEFAULT_PARSE_MODEL,
 ):
     """
     Invoke a Langchain agent for generating test scenarios from web pages.
@@ -79,16 +181,16 @@ def invoke_scenario_generation_agent(
         llm: A Langchain LLM instance (e.g., ChatOpenAI, ChatAnthropic, etc.)
         driver: Selenium WebDriver instance to use for browsing
         tools: Optional list of additional tools to include in the agent
+        navigate: Whether to load the URL first, unnecessary if the driver already displays it
+        parse_model: Model structuring the answer of the agent, if it does not match the schema
 
     Returns:
         A Langchain AgentExecutor configured with Selenium tools
     """
-    if isinstance(model, str):
-        model = init_chat_model(model)
+    model = resolve_chat_model(model)
 
     # Create the agent prompt
-    prompt_manager = get_prompt_manager()
-    system_message = prompt_manager.render("scenario_generation_system.j2")
+    system_message = render_static_prompt("scenario_generation_system.j2")
 
     prompt = create_scenario_generation_prompt(url=url, title=title, content=content)
     default_tools = [
@@ -98,19 +200,27 @@ def invoke_scenario_generation_agent(
         model=model,
         tools=tools or default_tools,
         system_prompt="You are a helpful assistant",
+        # The agent answers with the structured scenarios directly, rather than with prose
+        # parsed by a second LLM call
+        response_format=TestScenarioList,
         debug=True,
     )
-    driver.get(url)  # Forwards to URL as initial state
+    if navigate:
+        driver.get(url)  # Forwards to URL as initial state
     # Run the agent
     result = agent.invoke(
-        {"messages": [SystemMessage(content=system_message), HumanMessage(content=prompt)]}
+        {"messages": [create_system_message(model, system_message), HumanMessage(content=prompt)]}
     )
 
-    # Extract the message content from the agent result
-    agent_message = result["messages"][-1].content if "messages" in result else str(result)
+    structured_result = result.get("structured_response")
+    if structured_result is None:
+        # Extract the message content from the agent result
+        agent_message = result["messages"][-1].content if "messages" in result else str(result)
 
-    # Parse the unstructured response into structured output
-    structured_result = parse_scenarios_to_structured_output(model, agent_message)
+        # Parse the unstructured response into structured output
+        structured_result = parse_scenarios_to_structured_output(
+            resolve_chat_model(parse_model), agent_message
+        )
 
     return structured_result
 
@@ -126,13 +236,12 @@ def parse_scenarios_to_structured_output(model, scenario_text: str) -> TestScena
     Returns:
         TestScenarioList: A structured collection of test scenarios
     """
-    structured_llm = model.with_structured_output(TestScenarioList)
+    structured_llm = get_structured_model(model, TestScenarioList)
 
     prompt_manager = get_prompt_manager()
     parsing_prompt = prompt_manager.render("parse_scenarios.j2", scenario_text=scenario_text)
 
-    result = structured_llm.invoke(parsing_prompt)
-    return result
+    return invoke_validated(structured_llm, parsing_prompt)
 
 
 class TestExecutionResult(BaseModel):
@@ -152,12 +261,46 @@ class TestExecutionResult(BaseModel):
     )
 
 
+# Errors reported by the tools once the browser session is gone, which the agent cannot recover from
+BROWSER_FAILURE_PATTERN = re.compile(
+    r"invalid session id|no such window|disconnected: |browsing context has been discarded"
+    r"|without establishing a connection",
+    re.IGNORECASE,
+)
+
+
+def create_scenario_execution_agent(
+    driver: WebDriver, model: BaseChatModel | str, tools: list[BaseTool] = None
+):
+    """
+    Create the agent executing test scenarios on a browser.
+
+    The agent holds no state between invocations, so it can be built once per browser and
+    reused for all the scenarios run on it.
+
+    Args:
+        driver: Selenium WebDriver instance the tools act on
+        model: A Langchain LLM instance, or its name
+        tools: Optional list of tools replacing the default Selenium tools
+    Returns:
+        The compiled agent, answering with a TestExecutionResult
+    """
+    return create_agent(
+        model=resolve_chat_model(model),
+        tools=tools or get_selenium_tools(driver),
+        system_prompt="You are a test execution agent",
+        response_format=TestExecutionResult,
+    )
+
+
 def invoke_scenario_execution_agent(
     driver: WebDriver,
     scenario: TestScenario,
     url: str,
     model: BaseChatModel | str,
     tools: list[BaseTool] = None,
+    agent=None,
+    parse_model: BaseChatModel | str = DEFAULT_PARSE_MODEL,
 ) -> TestExecutionResult:
     """
     Execute a test scenario using Selenium and LLM agent.
@@ -171,19 +314,21 @@ def invoke_scenario_execution_agent(
         url: The base URL to test against
         model: A Langchain LLM instance (e.g., ChatOpenAI, ChatAnthropic, etc.)
         tools: Optional list of additional tools to include in the agent
+        agent: Optional agent built by create_scenario_execution_agent for this driver, reused
+            instead of building a new one
+        parse_model: Model structuring the report of the agent, if it does not match the schema
     Returns:
         TestExecutionResult: Structured result of the test execution
 
     """
 
-    if isinstance(model, str):
-        model = init_chat_model(model)
+    model = resolve_chat_model(model)
 
     start_time = time.time()
 
     # Create the system message for the execution agent
     prompt_manager = get_prompt_manager()
-    system_message = prompt_manager.render("scenario_execution_system.j2")
+    system_message = render_static_prompt("scenario_execution_system.j2")
 
     # Create the execution prompt
     execution_prompt = prompt_manager.render(
@@ -196,45 +341,77 @@ def invoke_scenario_execution_agent(
         expected_result=scenario.expected_result
     )
 
-    # Create the agent
-    agent = create_agent(
-        model=model,
-        tools=tools or get_selenium_tools(driver),
-        system_prompt="You are a test execution agent",
-    )
+    # Create the agent, answering with the structured result of the test directly
+    if agent is None:
+        agent = create_scenario_execution_agent(driver, model, tools)
 
     # Navigate to the URL as initial state
     driver.get(url)
 
-    # Run the agent to execute the test
-    result = agent.invoke(
+    # Run the agent to execute the test, stopping it as soon as the browser is lost
+    result = {}
+    for result in agent.stream(
         {
             "messages": [
-                SystemMessage(content=system_message),
+                create_system_message(model, system_message),
                 HumanMessage(content=execution_prompt),
             ]
-        }
-    )
+        },
+        stream_mode="values",
+    ):
+        last_message = result["messages"][-1]
+        if isinstance(last_message, ToolMessage) and BROWSER_FAILURE_PATTERN.search(
+            str(last_message.content)
+        ):
+            # Every further tool call would fail the same way, no need to generate them
+            return TestExecutionResult(
+                scenario_name=scenario.name,
+                status="ERROR",
+                execution_details=f"The browser became unavailable: {last_message.content}",
+                errors_encountered=[str(last_message.content)],
+                execution_time_seconds=time.time() - start_time,
+            )
 
     execution_time = time.time() - start_time
 
-    # Extract the execution report from the agent
-    agent_message = result["messages"][-1].content if "messages" in result else str(result)
+    execution_result = result.get("structured_response")
+    if execution_result is None:
+        # Extract the execution report from the agent
+        agent_message = result["messages"][-1].content if "messages" in result else str(result)
 
-    # Parse the execution report into structured output
-    structured_llm = model.with_structured_output(TestExecutionResult)
+        # Parse the execution report into structured output
+        execution_result = parse_execution_result_to_structured_output(
+            resolve_chat_model(parse_model), scenario.name, agent_message
+        )
+    execution_result.execution_time_seconds = execution_time
+
+    return execution_result
+
+
+def parse_execution_result_to_structured_output(
+    model, scenario_name: str, execution_report: str
+) -> TestExecutionResult:
+    """
+    Parse the LLM-generated execution report into a structured test result.
+
+    Args:
+        model: A Langchain LLM instance with structured output support
+        scenario_name: The name of the executed scenario
+        execution_report: The unstructured report of the execution agent
+
+    Returns:
+        TestExecutionResult: The structured result of the test execution
+    """
+    structured_llm = get_structured_model(model, TestExecutionResult)
 
     prompt_manager = get_prompt_manager()
     parsing_prompt = prompt_manager.render(
         "parse_execution_result.j2",
-        scenario_name=scenario.name,
-        execution_report=agent_message
+        scenario_name=scenario_name,
+        execution_report=execution_report
     )
 
-    execution_result = cast(TestExecutionResult, structured_llm.invoke(parsing_prompt))
-    execution_result.execution_time_seconds = execution_time
-
-    return execution_result
+    return cast(TestExecutionResult, invoke_validated(structured_llm, parsing_prompt))
 
 
 class TestExecutionReport(BaseModel):
@@ -247,13 +424,95 @@ class TestExecutionReport(BaseModel):
     results: List[TestExecutionResult] = Field(description="Individual test results")
 
 
-def downsize_image(img: Image.Image, max_size: tuple[int,int] = (1280,720)) -> Image.Image:
+class ScreenshotQuality(NamedTuple):
+    """Resampling filter and JPEG encoding settings of the screenshots sent to the VL model"""
+    resample: Image.Resampling
+    quality: int
+    optimize: bool
+
+
+SCREENSHOT_QUALITY_PROFILES: dict[str, ScreenshotQuality] = {
+    "high": ScreenshotQuality(Image.Resampling.LANCZOS, quality=85, optimize=True),
+    # Small VL models downsample the image to a few hundred pixels in their encoder anyway
+    "low": ScreenshotQuality(Image.Resampling.BILINEAR, quality=70, optimize=False),
+}
+
+# Statuses of providers rejecting the request itself (e.g. an unsupported response_format),
+# as opposed to authentication, quota or availability failures that a second call would repeat
+REJECTED_REQUEST_STATUSES = (400, 422)
+
+
+def is_rejected_request(error: Exception) -> bool:
+    """Whether a model call failed because the provider does not support the request as made."""
+    if isinstance(error, NotImplementedError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in REJECTED_REQUEST_STATUSES
+    if isinstance(error, HfHubHTTPError):
+        return error.response.status_code in REJECTED_REQUEST_STATUSES
+    return False
+
+
+# Names of VL models of at most a few billion parameters, or quantized
+SMALL_VL_MODEL_PATTERN = re.compile(
+    r"\b(?:0\.\d+|[1-4](?:\.\d+)?)b\b|llava-1\.5|awq|gptq|gguf|int[48]|[48]bit", re.IGNORECASE
+)
+
+
+def get_screenshot_quality_profile(vl_model: BaseChatModel | str) -> Literal["high", "low"]:
+    """Returns the screenshot quality profile suited to a VL model or its name, ``low`` for small models."""
+    if isinstance(vl_model, str):
+        name = vl_model
+    else:
+        names = (getattr(vl_model, attribute, None) for attribute in ("model_id", "model_name", "model"))
+        name = next((name for name in names if isinstance(name, str)), "")
+    return "low" if SMALL_VL_MODEL_PATTERN.search(name) else "high"
+
+
+def downsize_image(
+    img: Image.Image,
+    max_size: tuple[int,int] = (1280,720),
+    resample: Image.Resampling = Image.Resampling.LANCZOS,
+) -> Image.Image:
     # Downsize (e.g., to 50% of original size or a specific max width)
-    # Using Lanczos for high-quality downsampling
-    img.thumbnail(max_size, Image.Resampling.LANCZOS)
+    # Using Lanczos for high-quality downsampling, after a cheap integer reduction of large images
+    img.thumbnail(max_size, resample, reducing_gap=2.0)
     return img
 
-def prepare_screenshot_for_inference(driver: WebDriver) -> str:
+def _capture_downsized_jpeg(
+    driver: WebDriver, max_size: tuple[int, int] = (1280, 720), quality: int = 85
+) -> str | None:
+    """
+    Asks a Chromium browser for the viewport as an already downsized JPEG, through CDP.
+
+    :return: The Base64 encoded JPEG, or None if the browser does not support CDP.
+    """
+    if not hasattr(driver, "execute_cdp_cmd"):  # Firefox
+        return None
+    viewport = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})["cssVisualViewport"]
+    width, height = viewport["clientWidth"], viewport["clientHeight"]
+    # Same bounds as the thumbnail of the PIL path, never upscaled
+    scale = min(1.0, max_size[0] / width, max_size[1] / height)
+    screenshot = driver.execute_cdp_cmd(
+        "Page.captureScreenshot",
+        {
+            "format": "jpeg",
+            "quality": quality,
+            "clip": {
+                "x": viewport["pageX"],
+                "y": viewport["pageY"],
+                "width": width,
+                "height": height,
+                "scale": scale,
+            },
+        },
+    )
+    return screenshot["data"]
+
+
+def prepare_screenshot_for_inference(
+    driver: WebDriver, quality_profile: Literal["high", "low"] = "high"
+) -> str:
     """
     Prepares a browser screenshot for inference by processing and compressing the image data.
 
@@ -263,27 +522,39 @@ def prepare_screenshot_for_inference(driver: WebDriver) -> str:
 
     :param driver: WebDriver instance used to capture the screenshot.
     :type driver: WebDriver
+    :param quality_profile: Name of the resampling and encoding settings, among
+        ``SCREENSHOT_QUALITY_PROFILES``.
+    :type quality_profile: str
 
     :return: Base64 encoded string representation of the processed screenshot.
     :rtype: str
     """
+    profile = SCREENSHOT_QUALITY_PROFILES[quality_profile]
+    # Chromium browsers encode the downsized JPEG themselves, skipping the PNG round-trip
+    try:
+        b64 = _capture_downsized_jpeg(driver, quality=profile.quality)
+    except Exception:  # Fall back to the PNG screenshot
+        b64 = None
+    if b64 is not None:
+        return f"data:image/jpeg;base64,{b64}"
+
     screenshot_bytes = driver.get_screenshot_as_png()
 
     # Open with PIL
     img = Image.open(io.BytesIO(screenshot_bytes))
-    img = downsize_image(img)
+    # Convert to RGB to save as JPEG, before resizing so that the alpha channel is not resampled
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    img = downsize_image(img, resample=profile.resample)
 
     # Compress and convert back to bytes
     buffer = io.BytesIO()
-    # Convert to RGB if it's RGBA (PNG) to save as JPEG
-    if img.mode in ("RGBA", "P"):
-        img = img.convert("RGB")
 
     # Save as JPEG with compression quality 1-95 (85 is a good balance)
-    img.save(buffer, format="JPEG", quality=85, optimize=True)
+    img.save(buffer, format="JPEG", quality=profile.quality, optimize=profile.optimize)
 
-    # Convert to base64 string
-    b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    # Convert to base64 string, reading the buffer in place rather than copying it out
+    b64 = base64.b64encode(buffer.getbuffer()).decode("ascii")
     return f"data:image/jpeg;base64,{b64}"
 
 class UIAssessmentCategory(BaseModel):
@@ -316,22 +587,28 @@ def invoke_ui_analyzer_agent(driver: WebDriver,
     Args:
         driver: Selenium WebDriver instance with the page to analyze
         vl_model: Optional vision-language model to use for page analysis
-        model: Optional LLM model to use for structured output parsing
+        model: Optional LLM model to use for structured output parsing, if the VL model
+            does not follow the schema
     Returns:
         UIQualityAssessment: Structured assessment of the UI quality
     """
 
-    if vl_model is None:
-        vl_model = get_vl_model()
-    if isinstance(vl_model, str):
-        vl_model = init_chat_model(vl_model)
+    # The browser round-trip of the screenshot overlaps with the setup of the VL model client
+    # Known from the name of the model, without waiting for its client
+    quality_profile = get_screenshot_quality_profile(
+        DEFAULT_VL_MODEL if vl_model is None else vl_model
+    )
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="screenshot") as executor:
+        screenshot_future = executor.submit(prepare_screenshot_for_inference, driver, quality_profile)
 
-    # Capture the screenshot as bytes
-    base64_screenshot = prepare_screenshot_for_inference(driver)
+        if vl_model is None:
+            vl_model = get_vl_model()
+        vl_model = resolve_chat_model(vl_model)
 
-    # Create the analysis prompt
-    prompt_manager = get_prompt_manager()
-    analysis_prompt = prompt_manager.render("ui_analysis.j2")
+        # Create the analysis prompt
+        analysis_prompt = render_static_prompt("ui_analysis.j2")
+
+        base64_screenshot = screenshot_future.result()
 
     prompt = HumanMessage(
         content=[
@@ -343,20 +620,37 @@ def invoke_ui_analyzer_agent(driver: WebDriver,
         ]
     )
 
-    # Get the vision model's analysis
-    vl_response = vl_model.invoke([prompt])
-    analysis_text = vl_response.content if hasattr(vl_response, 'content') else str(vl_response)
+    # The vision model answers with the structured assessment directly, rather than with prose
+    # parsed by a second LLM call
+    structured_vl_model = get_structured_model(
+        vl_model, UIQualityAssessment, method="json_schema", include_raw=True
+    )
+    try:
+        vl_response = structured_vl_model.invoke([prompt])
+    except Exception as e:
+        if not is_rejected_request(e):
+            raise
+        # Some providers reject response_format altogether, the prose answer is parsed instead
+        vl_message = vl_model.invoke([prompt])
+    else:
+        if vl_response["parsed"] is not None:
+            try:
+                return UIQualityAssessment.model_validate(vl_response["parsed"])
+            except ValidationError:
+                pass
+        vl_message = vl_response["raw"]
+
+    analysis_text = vl_message.content if hasattr(vl_message, 'content') else str(vl_message)
 
     # Parse the unstructured analysis into structured output
     if model is None:
-        model = DEFAULT_MODEL
-    if isinstance(model, str):
-        model = init_chat_model(model)
+        model = DEFAULT_PARSE_MODEL
+    model = resolve_chat_model(model)
 
-    structured_llm = model.with_structured_output(UIQualityAssessment)
+    structured_llm = get_structured_model(model, UIQualityAssessment)
 
     prompt_manager = get_prompt_manager()
     parsing_prompt = prompt_manager.render("parse_ui_assessment.j2", analysis_text=analysis_text)
 
-    assessment = cast(UIQualityAssessment, structured_llm.invoke(parsing_prompt))
+    assessment = cast(UIQualityAssessment, invoke_validated(structured_llm, parsing_prompt))
     return assessment
\ No newline at end of file
@@ -1,10 +1,15 @@
+from functools import lru_cache
+
 from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
 
 import config
 
-DEFAULT_MODEL = config.config.default_model
-DEFAULT_VL_MODEL = config.config.default_vl_model
+DEFAULT_MODEL = config.get_config().default_model
+DEFAULT_VL_MODEL = config.get_config().default_vl_model
+# Parsing free-form answers into the schemas does not need the primary model
+DEFAULT_PARSE_MODEL = config.get_config().parse_model or DEFAULT_MODEL
 
+@lru_cache(maxsize=1)
 def get_vl_model():
     """
     Creates and returns a pre-configured Vision-Language (VL) model based on a
@@ -12,7 +17,8 @@ def get_vl_model():
 
     The returned VL model is configured to operate with conversational capabilities
     using the default repository and an auto-determined
-    provider.
+    provider. It is created once per process, so that concurrent UI analyses share the
+    same client and its connections to the inference provider.
 
     :return: An instance of `ChatHuggingFace` configured with a conversational
         VL model.
@@ -2,21 +2,25 @@
 Prompt Manager for handling Jinja2 templates
 """
 
+import threading
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any, Optional, Callable
-from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+from jinja2 import Environment, FileSystemLoader, Template, TemplateNotFound
 
 
 class PromptManager:
     """Manages prompt templates using Jinja2"""
 
     _instances: Dict[Path, "PromptManager"] = {}
+    _instances_lock = threading.Lock()
 
     def __new__(cls, templates_dir: Optional[Path] = None):
         """Singleton pattern"""
-        if templates_dir not in cls._instances:
-            cls._instances[templates_dir] = super().__new__(cls)
-        return cls._instances[templates_dir]
+        with cls._instances_lock:
+            if templates_dir not in cls._instances:
+                cls._instances[templates_dir] = super().__new__(cls)
+            return cls._instances[templates_dir]
 
     def __init__(self, templates_dir: Optional[Path] = None):
         """
@@ -26,6 +30,10 @@ class PromptManager:
             templates_dir: Path to the directory containing prompt templates.
                           Defaults to 'services/llm/prompts' relative to the project root.
         """
+        # The singleton is returned by every call, keep its environment and compiled templates
+        if getattr(self, "env", None) is not None:
+            return
+
         if templates_dir is None:
             # Default to the prompts directory in services/llm
             templates_dir = Path(__file__).parent / "prompts"
@@ -41,7 +49,12 @@ class PromptManager:
             trim_blocks=True,
             lstrip_blocks=True,
             autoescape=False,
+            # Templates ship with the code, compiled templates are reused without checking
+            # their file for changes on every render
+            auto_reload=False,
         )
+        # Compiled templates by name, skipping the locked lookup of the environment cache
+        self._templates: Dict[str, Template] = {}
 
     def render(self, template_name: str, **kwargs: Any) -> str:
         """
@@ -57,11 +70,13 @@ class PromptManager:
         Raises:
             TemplateNotFound: If the template file doesn't exist
         """
-        try:
-            template = self.env.get_template(template_name)
-            return template.render(**kwargs)
-        except TemplateNotFound:
-            raise FileNotFoundError(f"Template '{template_name}' not found in {self.templates_dir}")
+        template = self._templates.get(template_name)
+        if template is None:
+            try:
+                template = self._templates[template_name] = self.env.get_template(template_name)
+            except TemplateNotFound:
+                raise FileNotFoundError(f"Template '{template_name}' not found in {self.templates_dir}")
+        return template.render(**kwargs)
 
     def render_string(self, template_string: str, **kwargs: Any) -> str:
         """
@@ -127,6 +142,7 @@ class PromptManager:
         self.env.globals[name] = value
 
 
+@lru_cache(maxsize=1)
 def get_prompt_manager() -> PromptManager:
     """Get the global prompt manager instance"""
     return PromptManager()  # Unique instance by the singleton pattern
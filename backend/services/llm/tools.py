@@ -10,12 +10,30 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 import re
-from bs4 import BeautifulSoup
+import threading
+import weakref
 
+from services.evaluators.html.documents import parse_html
+
+
+# Control and non-printable characters, removed from the sanitized text
+CONTROL_CHARACTERS_PATTERN = re.compile(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
 
 # Global browser manager instance
 
 
+def _normalize_text(text: str) -> str:
+    # Remove control characters and non-printable characters
+    text = CONTROL_CHARACTERS_PATTERN.sub('', text)
+
+    # Normalize whitespace (replace multiple spaces/newlines with single space)
+    text = WHITESPACE_PATTERN.sub(' ', text)
+
+    # Strip leading/trailing whitespace
+    return text.strip()
+
+
 def sanitize_text(text: str, is_html: bool = False, max_length: int = 1000) -> str:
     """
     Sanitize text/HTML by removing unreadable characters, reducing HTML boilerplate, and truncating.
@@ -34,25 +52,29 @@ def sanitize_text(text: str, is_html: bool = False, max_length: int = 1000) -> s
     # If HTML, parse and extract meaningful content
     if is_html:
         try:
-            soup = BeautifulSoup(text, 'html.parser')
+            soup = parse_html(text)
 
             # Remove script and style elements
-            for element in soup(['script', 'style', 'meta', 'link', 'noscript', 'header', 'footer', 'nav']):
+            for element in soup(BOILERPLATE_TAGS):
                 element.decompose()
 
-            # Get text content
-            text = soup.get_text(separator=' ', strip=True)
+            # Get text content, equivalent to soup.get_text(separator=' ', strip=True) but only
+            # walking the document until the sanitized text exceeds the maximum length
+            strings = []
+            length = 0
+            next_check = max_length
+            for string in soup.stripped_strings:
+                strings.append(string)
+                length += len(string) + 1
+                if length > next_check:
+                    if len(_normalize_text(' '.join(strings))) > max_length:
+                        break
+                    next_check = 2 * length
+            text = ' '.join(strings)
         except:
             pass  # Fall back to text processing
 
-    # Remove control characters and non-printable characters
-    text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-
-    # Normalize whitespace (replace multiple spaces/newlines with single space)
-    text = re.sub(r'\s+', ' ', text)
-
-    # Strip leading/trailing whitespace
-    text = text.strip()
+    text = _normalize_text(text)
 
     # Truncate to max length
     if len(text) > max_length:
@@ -98,6 +120,44 @@ class ExecuteScriptInput(BaseModel):
     script: str = Field(description="JavaScript code to execute")
 
 
+# Elements whose content is dropped from the page content
+BOILERPLATE_TAGS = ('script', 'style', 'meta', 'link', 'noscript', 'header', 'footer', 'nav')
+
+# Returns the beginning of the page markup, without the boilerplate elements
+PAGE_CONTENT_SCRIPT = f"""
+const root = document.documentElement.cloneNode(true);
+root.querySelectorAll({', '.join(BOILERPLATE_TAGS)!r}).forEach(element => element.remove());
+return root.outerHTML.slice(0, arguments[0]);
+"""
+
+# Upper bound of markup characters fetched per character of text kept from the page
+HTML_CHARACTERS_PER_TEXT_CHARACTER = 32
+
+# Returns the beginning of the rendered text of the page
+PAGE_TEXT_SCRIPT = "return document.body ? document.body.innerText.slice(0, arguments[0]) : '';"
+
+# Upper bound of rendered text characters fetched per character kept, once whitespace is collapsed
+TEXT_CHARACTERS_PER_KEPT_CHARACTER = 8
+
+# Locks serializing the tools acting on the page of each driver
+_page_locks: "weakref.WeakKeyDictionary[WebDriver, threading.Lock]" = weakref.WeakKeyDictionary()
+_page_locks_guard = threading.Lock()
+# Tools built for each driver, they only hold weak proxies to it
+_selenium_tools: "weakref.WeakKeyDictionary[WebDriver, tuple[WithSeleniumDriver, ...]]" = (
+    weakref.WeakKeyDictionary()
+)
+_selenium_tools_guard = threading.Lock()
+
+
+def get_page_lock(driver: WebDriver) -> threading.Lock:
+    """Returns the lock held by the tools modifying the page displayed by a driver."""
+    with _page_locks_guard:
+        lock = _page_locks.get(driver)
+        if lock is None:
+            lock = _page_locks[driver] = threading.Lock()
+        return lock
+
+
 class WithSeleniumDriver(BaseTool):
     """
     Represents a tool that utilizes a Selenium WebDriver.
@@ -106,12 +166,19 @@ class WithSeleniumDriver(BaseTool):
     to automate browser activities. It inherits from the `BaseTool` class and
     is initialized with a Selenium WebDriver instance. This class is designed
     to facilitate browser-related functionalities by managing a WebDriver instance.
+
+    The agents run the tool calls of a single turn concurrently. Read-only tools run in
+    parallel, while tools modifying the page (navigation, clicks, inputs, scripts) hold the
+    page lock of their driver, so that they never interleave.
     """
     _driver: WebDriver = PrivateAttr()
+    _page_lock: threading.Lock = PrivateAttr()
 
     def __init__(self, driver: WebDriver, **kwargs):
         super().__init__(**kwargs)
-        self._driver = driver
+        # A weak proxy, so that the tools cached per driver do not keep it alive once it is dropped
+        self._driver = weakref.proxy(driver)
+        self._page_lock = get_page_lock(driver)
 
 
 # Selenium Tools
@@ -125,11 +192,12 @@ class SeleniumNavigateTool(WithSeleniumDriver):
         )
 
     def _run(self, url: str) -> str:
-        try:
-            self._driver.get(url)
-            return f"Successfully navigated to {url}. Page title: {self._driver.title}"
-        except Exception as e:
-            return f"Error navigating to {url}: {str(e)}"
+        with self._page_lock:
+            try:
+                self._driver.get(url)
+                return f"Successfully navigated to {url}. Page title: {self._driver.title}"
+            except Exception as e:
+                return f"Error navigating to {url}: {str(e)}"
 
 
 class SeleniumGetPageContentTool(WithSeleniumDriver):
@@ -141,9 +209,14 @@ class SeleniumGetPageContentTool(WithSeleniumDriver):
             args_schema=GetPageContentInput,
         )
 
-    def _run(self) -> str:
+    def _run(self, max_length: int = 1000) -> str:
         try:
-            return sanitize_text(self._driver.page_source, is_html=True)
+            # Only the beginning of the page is kept, it is cut by the browser rather than
+            # serializing the whole page over the WebDriver connection
+            page_source = self._driver.execute_script(
+                PAGE_CONTENT_SCRIPT, max_length * HTML_CHARACTERS_PER_TEXT_CHARACTER
+            )
+            return sanitize_text(page_source, is_html=True, max_length=max_length)
         except Exception as e:
             return f"Error getting page content: {str(e)}"
 
@@ -157,10 +230,14 @@ class SeleniumGetPageTextTool(WithSeleniumDriver):
             args_schema=GetPageContentInput,
         )
 
-    def _run(self) -> str:
+    def _run(self, max_length: int = 1000) -> str:
         try:
-            text = self._driver.find_element(By.TAG_NAME, "body").text
-            return sanitize_text(text)
+            # innerText is computed natively, unlike the visible text atom behind WebElement.text,
+            # and only its beginning is sent back
+            text = self._driver.execute_script(
+                PAGE_TEXT_SCRIPT, max_length * TEXT_CHARACTERS_PER_KEPT_CHARACTER
+            )
+            return sanitize_text(text, max_length=max_length)
         except Exception as e:
             return f"Error getting page text: {str(e)}"
 
@@ -196,15 +273,16 @@ class SeleniumClickElementTool(WithSeleniumDriver):
         )
 
     def _run(self, selector: str, timeout: int = 10) -> str:
-        try:
-            wait = WebDriverWait(self._driver, timeout)
-            element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
-            element.click()
-            return f"Successfully clicked element with selector '{selector}'"
-        except TimeoutException:
-            return f"Element with selector '{selector}' not clickable within {timeout} seconds"
-        except Exception as e:
-            return f"Error clicking element: {str(e)}"
+        with self._page_lock:
+            try:
+                wait = WebDriverWait(self._driver, timeout)
+                element = wait.until(EC.element_to_be_clickable((By.CSS_SELECTOR, selector)))
+                element.click()
+                return f"Successfully clicked element with selector '{selector}'"
+            except TimeoutException:
+                return f"Element with selector '{selector}' not clickable within {timeout} seconds"
+            except Exception as e:
+                return f"Error clicking element: {str(e)}"
 
 
 class SeleniumInputTextTool(WithSeleniumDriver):
@@ -217,16 +295,17 @@ class SeleniumInputTextTool(WithSeleniumDriver):
         )
 
     def _run(self, selector: str, text: str, timeout: int = 10) -> str:
-        try:
-            wait = WebDriverWait(self._driver, timeout)
-            element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
-            element.clear()
-            element.send_keys(text)
-            return f"Successfully input text into element with selector '{selector}'"
-        except TimeoutException:
-            return f"Element with selector '{selector}' not found within {timeout} seconds"
-        except Exception as e:
-            return f"Error inputting text: {str(e)}"
+        with self._page_lock:
+            try:
+                wait = WebDriverWait(self._driver, timeout)
+                element = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+                element.clear()
+                element.send_keys(text)
+                return f"Successfully input text into element with selector '{selector}'"
+            except TimeoutException:
+                return f"Element with selector '{selector}' not found within {timeout} seconds"
+            except Exception as e:
+                return f"Error inputting text: {str(e)}"
 
 
 class SeleniumGetElementTextTool(WithSeleniumDriver):
@@ -259,14 +338,15 @@ class SeleniumExecuteScriptTool(WithSeleniumDriver):
         )
 
     def _run(self, script: str) -> str:
-        try:
-            result = self._driver.execute_script(script)
-            if result is not None:
-                result_str = str(result)
-                return sanitize_text(result_str)
-            return "Script executed successfully"
-        except Exception as e:
-            return f"Error executing script: {str(e)}"
+        with self._page_lock:
+            try:
+                result = self._driver.execute_script(script)
+                if result is not None:
+                    result_str = str(result)
+                    return sanitize_text(result_str)
+                return "Script executed successfully"
+            except Exception as e:
+                return f"Error executing script: {str(e)}"
 
 
 class SeleniumGetCurrentUrlTool(WithSeleniumDriver):
@@ -287,15 +367,24 @@ class SeleniumGetCurrentUrlTool(WithSeleniumDriver):
 
 # Collection of all Selenium tools
 def get_selenium_tools(driver: WebDriver):
-    """Get all available Selenium browsing tools"""
-    return [
-        SeleniumNavigateTool(driver=driver),
-        SeleniumGetPageContentTool(driver=driver),
-        SeleniumGetPageTextTool(driver=driver),
-        SeleniumFindElementTool(driver=driver),
-        SeleniumClickElementTool(driver=driver),
-        SeleniumInputTextTool(driver=driver),
-        SeleniumGetElementTextTool(driver=driver),
-        SeleniumExecuteScriptTool(driver=driver),
-        SeleniumGetCurrentUrlTool(driver=driver),
-    ]
+    """
+    Get all available Selenium browsing tools
+
+    The tools hold no state besides their driver, they are built once per driver (which is
+    pooled across evaluations).
+    """
+    with _selenium_tools_guard:
+        tools = _selenium_tools.get(driver)
+        if tools is None:
+            tools = _selenium_tools[driver] = (
+                SeleniumNavigateTool(driver=driver),
+                SeleniumGetPageContentTool(driver=driver),
+                SeleniumGetPageTextTool(driver=driver),
+                SeleniumFindElementTool(driver=driver),
+                SeleniumClickElementTool(driver=driver),
+                SeleniumInputTextTool(driver=driver),
+                SeleniumGetElementTextTool(driver=driver),
+                SeleniumExecuteScriptTool(driver=driver),
+                SeleniumGetCurrentUrlTool(driver=driver),
+            )
+    return list(tools)